@@ -0,0 +1,31 @@
+import math
+import timeit
+
+import numpy as np
+
+from cpp import functions, special
+
+
+def loop_factorial(num):
+    # FactorialFunction.evaluate before it was vectorized
+    temp = []
+    for x in num:
+        temp.append(math.factorial(int(x)))
+    return np.array(temp)
+
+
+def main():
+    func = functions.FactorialFunction(functions.VariableFunction())
+    print(f'{"points":>8}{"loop ms":>12}{"vectorized ms":>16}{"speedup":>10}')
+    for bound, step in [(10., 0.01), (10., 0.001), (100., 0.01)]:
+        x = np.arange(0., bound, step)
+        loop = min(timeit.repeat(lambda: loop_factorial(x), number=1, repeat=5)) * 1000
+        vectorized = min(timeit.repeat(lambda: func.evaluate(x), number=1, repeat=5)) * 1000
+        print(f'{len(x):>8}{loop:>12.3f}{vectorized:>16.3f}{loop / vectorized:>10.1f}')
+
+    scalar = min(timeit.repeat(lambda: special.factorial(12), number=1000, repeat=5)) * 1000
+    print(f'scalar fast path: {scalar:.3f} us per call')
+
+
+if __name__ == '__main__':
+    main()
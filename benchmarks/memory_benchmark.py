@@ -0,0 +1,38 @@
+import gc
+import sys
+import tracemalloc
+
+from cpp import functions, reader
+
+FORMULAS = ['*(s(x),e(x))', '/(e(s(x)),+(2,c(x)))', '^(+(x,1),5)']
+
+
+def build(formula, n):
+    # Unsimplified derivatives, the worst case for the number of nodes
+    derivatives = [reader.read(formula)]
+    for _ in range(n):
+        derivatives.append(derivatives[-1].analytical_derivative())
+    return derivatives
+
+
+def main(n=6):
+    node = functions.SumFunction(functions.VariableFunction(), functions.PiFunction())
+    size = sys.getsizeof(node) + (sys.getsizeof(node.__dict__) if hasattr(node, '__dict__') else 0)
+    print(f'bytes per binary node: {size}')
+    print(f'{"formula":<24}{"unique nodes":>14}{"tree size":>14}{"traced KiB":>12}{"bytes/node":>12}')
+    build(FORMULAS[0], 1)
+    for formula in FORMULAS:
+        tracemalloc.start()
+        derivatives = build(formula, n)
+        # Only count what is still alive, not the garbage of the intermediate steps
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # sum_all adds one node to join them
+        nodes = functions.count_nodes(functions.sum_all(derivatives)) - 1
+        print(f'{formula:<24}{nodes:>14}{functions.tree_size(derivatives[-1]):>14}'
+              f'{current / 1024:>12.1f}{current / nodes:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import os
+import timeit
+
+import numpy as np
+
+from cpp import parallel, reader
+
+FORMULAS = ['*(s(x),e(c(x)))', '!(/(x,4))']
+
+
+def main(points=10 ** 7):
+    x = np.linspace(0., 40., points)
+    cores = os.cpu_count() or 1
+    print(f'{points} points, {cores} cores available')
+    print(f'{"formula":<20}{"workers":>8}{"thread ms":>12}{"speedup":>9}{"process ms":>12}{"speedup":>9}')
+    for formula in FORMULAS:
+        function = reader.read(formula)
+        base = {}
+        for workers in range(1, cores + 1):
+            row = []
+            for mode in ('thread', 'process'):
+                seconds = min(timeit.repeat(
+                    lambda: parallel.evaluate_parallel(function, x, workers=workers, mode=mode), number=1, repeat=3))
+                base.setdefault(mode, seconds)
+                row.append((seconds * 1000, base[mode] / seconds))
+            print(f'{formula:<20}{workers:>8}{row[0][0]:>12.1f}{row[0][1]:>9.2f}{row[1][0]:>12.1f}{row[1][1]:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import timeit
+
+import numpy as np
+
+from cpp import functions, reader
+
+FORMULAS = ['s(x)', '*(s(x),e(x))', '/(e(s(x)),+(2,c(x)))', '^(+(x,1),5)']
+
+
+def derivatives(function, n, simplify):
+    result = []
+    derivative = function
+    for _ in range(n):
+        derivative = simplify(derivative.analytical_derivative())
+        result.append(derivative)
+    return result
+
+
+def measure(function, x):
+    program = function.compile()
+    evaluate = min(timeit.repeat(lambda: function.evaluate(x), number=1, repeat=3)) * 1000
+    compiled = min(timeit.repeat(lambda: program(x), number=1, repeat=3)) * 1000
+    return functions.tree_size(function), functions.count_nodes(function), evaluate, compiled
+
+
+def main(n=5):
+    x = np.arange(-10., 10., 0.001)
+    print('nodes: tree size / unique nodes, times in ms: evaluate / compiled')
+    print(f'{"formula":<22}{"order":>6}{"simplify nodes":>18}{"canonical nodes":>18}'
+          f'{"simplify ms":>18}{"canonical ms":>18}')
+    for formula in FORMULAS:
+        function = reader.read(formula)
+        local = derivatives(function, n, lambda f: f.simplify())
+        canonical = derivatives(function, n, lambda f: f.canonicalize())
+        for order, (first, second) in enumerate(zip(local, canonical), 1):
+            a = measure(first, x)
+            b = measure(second, x)
+            print(f'{formula:<22}{order:>6}{f"{a[0]} / {a[1]}":>18}{f"{b[0]} / {b[1]}":>18}'
+                  f'{f"{a[2]:.2f} / {a[3]:.2f}":>18}{f"{b[2]:.2f} / {b[3]:.2f}":>18}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache:
+    # maxsize limits the number of entries, or the total size of the values when sizeof is given
+    def __init__(self, maxsize=128, sizeof=None):
+        self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.currsize = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._items:
+                self.currsize -= self._size(self._items[key])
+            self._items[key] = value
+            self._items.move_to_end(key)
+            self.currsize += self._size(value)
+            self._evict()
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.currsize = 0
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, self.currsize)
+
+    def _size(self, value):
+        return 1 if self.sizeof is None else self.sizeof(value)
+
+    def _evict(self):
+        while self.currsize > self.maxsize:
+            _, value = self._items.popitem(last=False)
+            self.currsize -= self._size(value)
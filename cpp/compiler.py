@@ -0,0 +1,120 @@
+import numpy as np
+
+from . import special
+
+
+class Constant:
+    def __init__(self, value):
+        self.value = np.float64(value)
+
+
+class Plan:
+    def __init__(self):
+        self.instructions = []
+        self.register_count = 1  # register 0 holds the input
+        self.operands = {}
+
+    def operand(self, func):
+        # Subtrees that appear more than once are only lowered once
+        if func not in self.operands:
+            self.operands[func] = func.compile_to(self)
+        return self.operands[func]
+
+    def variable(self):
+        return 0
+
+    def constant(self, value):
+        return Constant(value)
+
+    def apply(self, op, *args):
+        if all(isinstance(arg, Constant) for arg in args):
+            return Constant(op(*[arg.value for arg in args]))
+
+        out = self.register_count
+        self.register_count += 1
+        self.instructions.append((op, args, out))
+        return out
+
+    def factorial(self, func):
+        # FactorialFunction evaluates its argument on the truncated input
+        program = compile_function(func)
+        if program.is_constant():
+            return Constant(special.factorial(np.trunc(program.result.value)))
+        return self.apply(FactorialOp(program), self.variable())
+
+
+class FactorialOp:
+    def __init__(self, program):
+        self.program = program
+
+    def __call__(self, num):
+        return special.factorial(self.program(np.trunc(num)))
+
+
+def add_all(*args):
+    result = args[0]
+    for arg in args[1:]:
+        result = result + arg
+    return result
+
+
+def multiply_all(*args):
+    result = args[0]
+    for arg in args[1:]:
+        result = result * arg
+    return result
+
+
+class CompiledFunction:
+    def __init__(self, plan, results):
+        self.results = results
+        self.register_count = plan.register_count
+
+        last_use = {}
+        for index, (_, args, _) in enumerate(plan.instructions):
+            for arg in args:
+                if not isinstance(arg, Constant):
+                    last_use[arg] = index
+
+        keep = {0}
+        keep.update(result for result in results if not isinstance(result, Constant))
+        self.instructions = []
+        for index, (op, args, out) in enumerate(plan.instructions):
+            release = tuple(arg for arg, last in last_use.items() if last == index and arg not in keep)
+            self.instructions.append((op, args, out, release))
+
+    def __call__(self, num):
+        return self.evaluate_all(num)[0]
+
+    def __len__(self):
+        return len(self.instructions)
+
+    @property
+    def result(self):
+        return self.results[0]
+
+    def evaluate_all(self, num):
+        registers = [None] * self.register_count
+        registers[0] = num
+        for op, args, out, release in self.instructions:
+            registers[out] = op(*[arg.value if isinstance(arg, Constant) else registers[arg] for arg in args])
+            for register in release:
+                registers[register] = None
+        return [
+            np.full(np.shape(num), result.value) if isinstance(result, Constant) else registers[result]
+            for result in self.results
+        ]
+
+    def is_constant(self):
+        return all(isinstance(result, Constant) for result in self.results)
+
+
+def compile_function(func):
+    return compile_functions([func])
+
+
+def compile_functions(funcs):
+    # Every function shares one plan, so a subtree that occurs in several of them is computed once
+    plan = Plan()
+    results = [plan.operand(func) for func in funcs]
+    return CompiledFunction(plan, results)
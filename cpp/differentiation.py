@@ -0,0 +1,135 @@
+import numpy as np
+
+# Numerical derivatives of a function at many points. Evaluations of the function per point:
+#
+#   newton_derivative  2    forward difference, error O(h)
+#   central            2    error O(h^2)
+#   richardson         2 * levels, all in one batched call, error O(h^(2 * levels))
+#   complex_step       1    complex evaluation, exact to machine precision for analytic functions
+#   on_grid            1    plus order // 2 points past both ends of the grid, error O(step^order)
+#   uniform            0    reuses samples that were already computed on a uniform grid
+#
+# Taylor coefficients up to order n at one point, in a single batched evaluation:
+#
+#   contour_taylor     16 * max(32, 4 * (n + 1)) + 1 complex evaluations, accurate to about machine precision
+#   stencil_taylor     2 * n + 1 evaluations
+
+
+def central(function, x, h=1e-5):
+    program = function.compile()
+    x = np.asarray(x, dtype=np.float64)
+    return (program(x + h) - program(x - h)) / (2 * h)
+
+
+def richardson(function, x, h=0.1, levels=3):
+    # Central differences with h, h / 2, h / 4, ... combined so their error terms cancel
+    program = function.compile()
+    x = np.asarray(x, dtype=np.float64)
+    steps = h / 2. ** np.arange(levels)
+    steps = steps.reshape((levels,) + (1,) * x.ndim)
+    points = np.concatenate([x + steps, x - steps])
+    y = np.broadcast_to(program(points), points.shape)
+    estimates = (y[:levels] - y[levels:]) / (2 * steps)
+
+    previous = [estimates[0]]
+    for i in range(1, levels):
+        row = [estimates[i]]
+        for j in range(1, i + 1):
+            row.append(row[j - 1] + (row[j - 1] - previous[j - 1]) / (4 ** j - 1))
+        previous = row
+    return previous[-1]
+
+
+def complex_step(function, x, h=1e-20):
+    # f(x + ih) = f(x) + ih f'(x) + O(h^2), the imaginary part has no subtraction to lose digits in.
+    # Only works for functions that accept complex input, so not for factorials.
+    program = function.compile()
+    x = np.asarray(x, dtype=np.float64)
+    return np.imag(program(x + 1j * h)) / h
+
+
+def uniform(y, step, order=4):
+    # Derivative of samples on a uniform grid, the first and last points use one sided differences
+    y = np.asarray(y, dtype=np.float64)
+    if order not in (2, 4):
+        raise ValueError(f'{order} is not a valid order, use 2 or 4')
+    if len(y) < order + 1:
+        raise ValueError(f'At least {order + 1} samples are needed')
+
+    if order == 2:
+        return np.gradient(y, step, edge_order=2)
+
+    derivative = np.empty_like(y)
+    derivative[2:-2] = (y[:-4] - 8 * y[1:-3] + 8 * y[3:-1] - y[4:]) / (12 * step)
+    first = np.array([[-25., 48., -36., 16., -3.], [-3., -10., 18., -6., 1.]]) / (12 * step)
+    derivative[:2] = first @ y[:5]
+    derivative[-2:] = -first[::-1, ::-1] @ y[-5:]
+    return derivative
+
+
+def on_grid(function, x, order=4):
+    # x has to be uniform like np.arange. The grid is extended on both sides so every point
+    # gets a central difference.
+    x = np.asarray(x, dtype=np.float64)
+    step = x[1] - x[0]
+    pad = order // 2
+    extended = x[0] + np.arange(-pad, len(x) + pad) * step
+    y = np.broadcast_to(function.compile()(extended), extended.shape)
+    return uniform(y, step, order)[pad:-pad]
+
+
+def taylor_coefficients(function, n=8, a=0., method='auto'):
+    # f(a), f'(a), f''(a) / 2!, ..., f^(n)(a) / n! from a single batched evaluation of the
+    # function, whatever n is. auto uses the contour unless the function cannot be evaluated
+    # for complex input, like factorials, or is not analytic at a, like sqrt at 0.
+    if method == 'contour':
+        return contour_taylor(function, n, a)
+    if method == 'stencil':
+        return stencil_taylor(function, n, a)
+    if method != 'auto':
+        raise ValueError(f'{method} is not a valid method, use auto, contour or stencil')
+    try:
+        return contour_taylor(function, n, a)
+    except (TypeError, ValueError):
+        return stencil_taylor(function, n, a)
+
+
+def contour_taylor(function, n=8, a=0., radius=0.5, points=None, halvings=16, tol=1e-10):
+    # The Taylor series at a is a Fourier series on a circle around a, so the FFT of samples on
+    # the circle gives the coefficients. That needs the circle to be inside the radius of
+    # convergence. A singularity inside it shows up as negative frequencies, so circles of
+    # radius, radius / 2, radius / 4, ... are all sampled in one batch together with a itself,
+    # and the largest one whose negative frequencies are negligible and whose mean matches
+    # f(a) is used. f(a) has to be real, which rules out a on a branch cut like sqrt at -1.
+    points = points or max(32, 4 * (n + 1))
+    radii = radius / 2. ** np.arange(halvings)
+    z = a + radii[:, None] * np.exp(2j * np.pi * np.arange(points) / points)
+    batch = np.append(z.ravel(), a + 0j)
+    with np.errstate(all='ignore'):
+        y = np.broadcast_to(function.compile()(batch), batch.shape)
+        fourier = np.fft.fft(y[:-1].reshape(z.shape), axis=1) / points
+    value = y[-1]
+
+    for r, b in zip(radii, fourier):
+        if not np.all(np.isfinite(b)):
+            continue
+        scale = np.max(np.abs(b))
+        if np.max(np.abs(b[points // 2:])) > tol * scale:
+            continue
+        if abs(value.imag) > tol * scale or not np.isclose(b[0], value, rtol=1e-8, atol=tol * scale):
+            continue
+        return b[:n + 1].real / r ** np.arange(n + 1)
+    raise ValueError(f'{function} is not analytic within {radii[-1]} of {a}')
+
+
+def stencil_taylor(function, n=8, a=0., h=0.05):
+    # Interpolates 2n + 1 equally spaced samples around a and takes the Taylor coefficients of
+    # the interpolating polynomial. The points are scaled to [-1, 1] to keep the system well
+    # conditioned. Real differences lose digits quickly, expect about 4 correct digits for n = 8.
+    a = float(a)
+    s = np.linspace(-1., 1., 2 * n + 1)
+    width = n * h
+    x = a + width * s
+    y = np.broadcast_to(function.compile()(x), x.shape)
+    coefficients = np.linalg.solve(np.vander(s, increasing=True), y)
+    return coefficients[:n + 1] / width ** np.arange(n + 1)
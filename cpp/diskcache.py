@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from . import functions, gaussian
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+SUFFIX = '.json.z'
+TEMP_SUFFIX = '.tmp'
+# Temporary files older than this are left over from a writer that crashed
+STALE_SECONDS = 60 * 60
+# Part of every key. Bump it whenever the serialized format or the results of the cached
+# computations change, like new node types or simplification rules, so old entries miss.
+VERSION = 3
+
+_default_cache = None
+
+
+def serialize(function):
+    # Nodes are written once each in post-order and refer to their children by index, so
+    # shared subtrees stay shared and deep expressions do not need recursion.
+    index = {}
+    nodes = []
+    stack = [function]
+    while stack:
+        func = stack[-1]
+        pending = [child for child in func.children() if child not in index]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        if func not in index:
+            index[func] = len(nodes)
+            nodes.append([type(func).__name__, [encode(arg, index) for arg in func.arguments()]])
+    return json.dumps(nodes, separators=(',', ':'))
+
+
+def encode(arg, index):
+    if isinstance(arg, functions.BaseFunction):
+        return {'node': index[arg]}
+    if isinstance(arg, (tuple, list, np.ndarray)):
+        return [encode(item, index) for item in arg]
+    if isinstance(arg, (np.integer, int)):
+        return int(arg)
+    return float(arg)
+
+
+def deserialize(text):
+    nodes = []
+    for name, args in json.loads(text):
+        cls = getattr(functions, name, None)
+        if not (isinstance(cls, type) and issubclass(cls, functions.BaseFunction)):
+            raise ValueError(f'{name} is not a function type')
+        nodes.append(cls(*[decode(arg, nodes) for arg in args]))
+    return nodes[-1]
+
+
+def decode(arg, nodes):
+    if isinstance(arg, dict):
+        return nodes[arg['node']]
+    if isinstance(arg, list):
+        return [decode(item, nodes) for item in arg]
+    return arg
+
+
+def digest(function):
+    return hashlib.sha256(serialize(function).encode()).hexdigest()
+
+
+class DiskCache:
+    # Entries are compressed serialized functions in one file each, named after the hash of
+    # their key. Files are written to a temporary name and renamed into place, so processes
+    # sharing the directory never read a partial entry. Eviction removes the least recently
+    # used files once the directory grows past max_bytes.
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, *parts):
+        return hashlib.sha256(json.dumps((VERSION,) + parts, separators=(',', ':')).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                function = deserialize(zlib.decompress(file.read()).decode())
+            os.utime(path)
+        except (OSError, ValueError, zlib.error):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return function
+
+    def put(self, key, function):
+        data = zlib.compress(serialize(function).encode())
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=TEMP_SUFFIX)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, self.path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        function = self.get(key)
+        if function is None:
+            function = compute()
+            self.put(key, function)
+        return function
+
+    def scan(self):
+        # (mtime, size, path, evictable) of every file in the directory. Temporary files of
+        # writers that are still running count towards the size but cannot be removed yet.
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith((SUFFIX, TEMP_SUFFIX)):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            stale = entry.name.endswith(TEMP_SUFFIX) and now - stat.st_mtime > STALE_SECONDS
+            if stale:
+                remove(entry.path)
+                continue
+            yield stat.st_mtime, stat.st_size, entry.path, entry.name.endswith(SUFFIX)
+
+    def evict(self):
+        entries = list(self.scan())
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, path, evictable in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if evictable:
+                remove(path)
+                total -= size
+
+    def size(self):
+        return sum(size for _, size, _, _ in self.scan())
+
+    def clear(self):
+        for _, _, path, evictable in list(self.scan()):
+            if evictable:
+                remove(path)
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        directory = os.environ.get('CPP_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'cpp')
+        _default_cache = DiskCache(directory)
+    return _default_cache
+
+
+def derivative(function, n=1, cache=None):
+    cache = cache or default_cache()
+    key = cache.key('derivative', digest(function), n)
+    return cache.get_or_compute(key, lambda: function.derivative(n))
+
+
+def taylor_analytical(function, n=8, a=0., cache=None):
+    cache = cache or default_cache()
+    a = float(a)
+    key = cache.key('taylor_analytical', digest(function), n, a)
+    return cache.get_or_compute(key, lambda: functions.taylor_analytical(function, n, a))
+
+
+def interpolation(coordinates_str, cache=None):
+    cache = cache or default_cache()
+    coordinates = gaussian.parse_coordinates(coordinates_str)
+    key = cache.key('interpolation', coordinates.tolist())
+    return cache.get_or_compute(key, lambda: gaussian.from_string(coordinates_str))
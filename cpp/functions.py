@@ -1,10 +1,68 @@
-from abc import ABC, abstractmethod
+import hashlib
+import inspect
+import weakref
+from abc import ABC, ABCMeta, abstractmethod
 
 import graphviz as gv
 import numpy as np
 
+from . import cache, compiler, differentiation, jets, quadrature, special
+
+_interned = weakref.WeakValueDictionary()
+derivative_cache = cache.LRUCache(256)
+evaluation_cache = cache.LRUCache(64 * 1024 * 1024, sizeof=lambda value: value.nbytes)
+
+
+class FunctionMeta(ABCMeta):
+    # Functions are interned on their structure, so building an expression that
+    # already exists returns the existing object and equal subtrees are shared.
+    def __call__(cls, *args, **kwargs):
+        if kwargs:
+            # Keyword arguments are bound to positions so they intern the same as positional ones
+            bound = inspect.signature(cls.__init__).bind(None, *args, **kwargs)
+            args = bound.args[1:]
+        # Look the arguments up first so existing nodes are returned without building a
+        # throwaway object. Arguments that still need converting or cannot be hashed miss here.
+        try:
+            func = _interned.get((cls,) + args)
+        except TypeError:
+            func = None
+        if func is not None:
+            return func
+
+        func = super().__call__(*args)
+        key = (cls,) + func.arguments()
+        object.__setattr__(func, '_hash', hash(key))
+        object.__setattr__(func, '_frozen', True)
+        return _interned.setdefault(key, func)
+
+
+class BaseFunction(ABC, metaclass=FunctionMeta):
+    __slots__ = ('_hash', '_frozen', '__weakref__')
+    fields = ()
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f'{type(self).__name__} is immutable')
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        return type(self) is type(other) and self.arguments() == other.arguments()
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return type(self), self.arguments()
+
+    def arguments(self):
+        return tuple(getattr(self, name) for name in self.fields)
+
+    def children(self):
+        return tuple(arg for arg in self.arguments() if isinstance(arg, BaseFunction))
 
-class BaseFunction(ABC):
     @abstractmethod
     def to_string(self):
         return 'Base Class'
@@ -45,8 +103,38 @@ class BaseFunction(ABC):
     def riemann_integral(self, x1, x2, interval=0.001):
         pass
 
+    @abstractmethod
+    def compile_to(self, plan):
+        pass
+
+    @abstractmethod
+    def evaluate_jet(self, num, n):
+        pass
+
+    @abstractmethod
+    def evaluate_with_derivative(self, num):
+        pass
+
+    def compile(self):
+        return compiler.compile_function(self)
+
+    def derivative(self, n=1):
+        return derivative(self, n)
+
+    def canonicalize(self):
+        from . import simplifier
+        return simplifier.canonicalize(self)
+
+    def taylor_coefficients(self, n=8, a=0.):
+        return self.evaluate_jet(np.asarray(a, dtype=float), n)
+
+    def integrate(self, x1, x2, tol=1e-10):
+        return quadrature.integrate(self, x1, x2, tol)
+
 
 class NaturalNumberFunction(BaseFunction):
+    __slots__ = fields = ('number',)
+
     def __init__(self, num):
         self.number = np.int(num)
 
@@ -60,7 +148,7 @@ class NaturalNumberFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return NaturalNumberFunction(self.number)
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -80,7 +168,7 @@ class NaturalNumberFunction(BaseFunction):
         return (self.evaluate(x + h) - self.evaluate(x)) / h
 
     def simplify(self):
-        return self.copy()
+        return self
 
     def riemann_integral(self, x1, x2, interval=0.001):
         x = np.arange(x1, x2, interval)
@@ -88,8 +176,20 @@ class NaturalNumberFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.constant(self.number)
+
+    def evaluate_jet(self, num, n):
+        return jets.constant(self.number, num, n)
+
+    def evaluate_with_derivative(self, num):
+        value = self.evaluate(num)
+        return value, np.zeros_like(value)
+
 
 class RealNumberFunction(BaseFunction):
+    __slots__ = fields = ('number',)
+
     def __init__(self, num):
         self.number = np.float(num)
 
@@ -103,7 +203,7 @@ class RealNumberFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return RealNumberFunction(self.number)
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -123,7 +223,7 @@ class RealNumberFunction(BaseFunction):
         return (self.evaluate(x + h) - self.evaluate(x)) / h
 
     def simplify(self):
-        return self.copy()
+        return self
 
     def riemann_integral(self, x1, x2, interval=0.001):
         x = np.arange(x1, x2, interval)
@@ -131,8 +231,20 @@ class RealNumberFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.constant(self.number)
+
+    def evaluate_jet(self, num, n):
+        return jets.constant(self.number, num, n)
+
+    def evaluate_with_derivative(self, num):
+        value = self.evaluate(num)
+        return value, np.zeros_like(value)
+
 
 class PiFunction(BaseFunction):
+    __slots__ = ()
+
     def to_string(self):
         return '\u03C0'
 
@@ -143,7 +255,7 @@ class PiFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return PiFunction()
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -163,7 +275,7 @@ class PiFunction(BaseFunction):
         return (self.evaluate(x + h) - self.evaluate(x)) / h
 
     def simplify(self):
-        return self.copy()
+        return self
 
     def riemann_integral(self, x1, x2, interval=0.001):
         x = np.arange(x1, x2, interval)
@@ -171,8 +283,20 @@ class PiFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.constant(np.pi)
+
+    def evaluate_jet(self, num, n):
+        return jets.constant(np.pi, num, n)
+
+    def evaluate_with_derivative(self, num):
+        value = self.evaluate(num)
+        return value, np.zeros_like(value)
+
 
 class VariableFunction(BaseFunction):
+    __slots__ = ()
+
     def to_string(self):
         return 'x'
 
@@ -183,7 +307,7 @@ class VariableFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return VariableFunction()
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -203,7 +327,7 @@ class VariableFunction(BaseFunction):
         return (self.evaluate(x + h) - self.evaluate(x)) / h
 
     def simplify(self):
-        return self.copy()
+        return self
 
     def riemann_integral(self, x1, x2, interval=0.001):
         x = np.arange(x1, x2, interval)
@@ -211,8 +335,19 @@ class VariableFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.variable()
+
+    def evaluate_jet(self, num, n):
+        return jets.variable(num, n)
+
+    def evaluate_with_derivative(self, num):
+        return num, np.ones_like(num)
+
 
 class SumFunction(BaseFunction):
+    __slots__ = fields = ('firstFunction', 'secondFunction')
+
     def __init__(self, firstFun, secondFun):
         self.firstFunction = firstFun
         self.secondFunction = secondFun
@@ -227,7 +362,7 @@ class SumFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return SumFunction(self.firstFunction.copy(), self.secondFunction.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -269,8 +404,21 @@ class SumFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.apply(np.add, plan.operand(self.firstFunction), plan.operand(self.secondFunction))
+
+    def evaluate_jet(self, num, n):
+        return self.firstFunction.evaluate_jet(num, n) + self.secondFunction.evaluate_jet(num, n)
+
+    def evaluate_with_derivative(self, num):
+        f, df = self.firstFunction.evaluate_with_derivative(num)
+        g, dg = self.secondFunction.evaluate_with_derivative(num)
+        return f + g, df + dg
+
 
 class DifferenceFunction(BaseFunction):
+    __slots__ = fields = ('firstFunction', 'secondFunction')
+
     def __init__(self, firstFun, secondFun):
         self.firstFunction = firstFun
         self.secondFunction = secondFun
@@ -285,7 +433,7 @@ class DifferenceFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return DifferenceFunction(self.firstFunction.copy(), self.secondFunction.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -327,8 +475,21 @@ class DifferenceFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.apply(np.subtract, plan.operand(self.firstFunction), plan.operand(self.secondFunction))
+
+    def evaluate_jet(self, num, n):
+        return self.firstFunction.evaluate_jet(num, n) - self.secondFunction.evaluate_jet(num, n)
+
+    def evaluate_with_derivative(self, num):
+        f, df = self.firstFunction.evaluate_with_derivative(num)
+        g, dg = self.secondFunction.evaluate_with_derivative(num)
+        return f - g, df - dg
+
 
 class ProductFunction(BaseFunction):
+    __slots__ = fields = ('firstFunction', 'secondFunction')
+
     def __init__(self, firstFun, secondFun):
         self.firstFunction = firstFun
         self.secondFunction = secondFun
@@ -343,7 +504,7 @@ class ProductFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return ProductFunction(self.firstFunction.copy(), self.secondFunction.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -365,10 +526,10 @@ class ProductFunction(BaseFunction):
         return SumFunction(
             ProductFunction(
                 self.firstFunction.analytical_derivative(),
-                self.secondFunction.copy()
+                self.secondFunction
             ),
             ProductFunction(
-                self.firstFunction.copy(),
+                self.firstFunction,
                 self.secondFunction.analytical_derivative()
             )
         )
@@ -396,8 +557,21 @@ class ProductFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.apply(np.multiply, plan.operand(self.firstFunction), plan.operand(self.secondFunction))
+
+    def evaluate_jet(self, num, n):
+        return jets.multiply(self.firstFunction.evaluate_jet(num, n), self.secondFunction.evaluate_jet(num, n))
+
+    def evaluate_with_derivative(self, num):
+        f, df = self.firstFunction.evaluate_with_derivative(num)
+        g, dg = self.secondFunction.evaluate_with_derivative(num)
+        return f * g, df * g + f * dg
+
 
 class QuotientFunction(BaseFunction):
+    __slots__ = fields = ('firstFunction', 'secondFunction')
+
     def __init__(self, firstFun, secondFun):
         self.firstFunction = firstFun
         self.secondFunction = secondFun
@@ -412,7 +586,7 @@ class QuotientFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return QuotientFunction(self.firstFunction.copy(), self.secondFunction.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -435,15 +609,15 @@ class QuotientFunction(BaseFunction):
             DifferenceFunction(
                 ProductFunction(
                     self.firstFunction.analytical_derivative(),
-                    self.secondFunction.copy()
+                    self.secondFunction
                 ),
                 ProductFunction(
-                    self.firstFunction.copy(),
+                    self.firstFunction,
                     self.secondFunction.analytical_derivative()
                 )
             ),
             PowerFunction(
-                self.secondFunction.copy(),
+                self.secondFunction,
                 NaturalNumberFunction(2)
             )
         )
@@ -468,8 +642,21 @@ class QuotientFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.apply(np.true_divide, plan.operand(self.firstFunction), plan.operand(self.secondFunction))
+
+    def evaluate_jet(self, num, n):
+        return jets.divide(self.firstFunction.evaluate_jet(num, n), self.secondFunction.evaluate_jet(num, n))
+
+    def evaluate_with_derivative(self, num):
+        f, df = self.firstFunction.evaluate_with_derivative(num)
+        g, dg = self.secondFunction.evaluate_with_derivative(num)
+        return f / g, (df * g - f * dg) / g ** 2
+
 
 class PowerFunction(BaseFunction):
+    __slots__ = fields = ('firstFunction', 'secondFunction')
+
     def __init__(self, firstFun, secondFun):
         self.firstFunction = firstFun
         self.secondFunction = secondFun
@@ -484,7 +671,7 @@ class PowerFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return PowerFunction(self.firstFunction.copy(), self.secondFunction.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -505,11 +692,11 @@ class PowerFunction(BaseFunction):
     def analytical_derivative(self):
         return ProductFunction(
             ProductFunction(
-                self.secondFunction.copy(),
+                self.secondFunction,
                 PowerFunction(
-                    self.firstFunction.copy(),
+                    self.firstFunction,
                     DifferenceFunction(
-                        self.secondFunction.copy(),
+                        self.secondFunction,
                         NaturalNumberFunction(1)
                     )
                 )
@@ -538,8 +725,25 @@ class PowerFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.apply(np.power, plan.operand(self.firstFunction), plan.operand(self.secondFunction))
+
+    def evaluate_jet(self, num, n):
+        return jets.power(self.firstFunction.evaluate_jet(num, n), self.secondFunction.evaluate_jet(num, n))
+
+    def evaluate_with_derivative(self, num):
+        f, df = self.firstFunction.evaluate_with_derivative(num)
+        g, dg = self.secondFunction.evaluate_with_derivative(num)
+        value = f ** g
+        derivative = g * f ** (g - 1) * df
+        if np.any(dg != 0):
+            derivative = derivative + value * np.log(f) * dg
+        return value, derivative
+
 
 class SineFunction(BaseFunction):
+    __slots__ = fields = ('function',)
+
     def __init__(self, fun):
         self.function = fun
 
@@ -553,7 +757,7 @@ class SineFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return SineFunction(self.function.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -572,7 +776,7 @@ class SineFunction(BaseFunction):
     def analytical_derivative(self):
         return ProductFunction(
             CosineFunction(
-                self.function.copy()
+                self.function
             ),
             self.function.analytical_derivative()
         )
@@ -594,8 +798,20 @@ class SineFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.apply(np.sin, plan.operand(self.function))
+
+    def evaluate_jet(self, num, n):
+        return jets.sin_cos(self.function.evaluate_jet(num, n))[0]
+
+    def evaluate_with_derivative(self, num):
+        f, df = self.function.evaluate_with_derivative(num)
+        return np.sin(f), np.cos(f) * df
+
 
 class CosineFunction(BaseFunction):
+    __slots__ = fields = ('function',)
+
     def __init__(self, fun):
         self.function = fun
 
@@ -609,7 +825,7 @@ class CosineFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return CosineFunction(self.function.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -629,7 +845,7 @@ class CosineFunction(BaseFunction):
         return ProductFunction(
             DifferenceFunction(
                 NaturalNumberFunction(0),
-                SineFunction(self.function.copy())
+                SineFunction(self.function)
             ),
             self.function.analytical_derivative()
         )
@@ -651,8 +867,20 @@ class CosineFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.apply(np.cos, plan.operand(self.function))
+
+    def evaluate_jet(self, num, n):
+        return jets.sin_cos(self.function.evaluate_jet(num, n))[1]
+
+    def evaluate_with_derivative(self, num):
+        f, df = self.function.evaluate_with_derivative(num)
+        return np.cos(f), -np.sin(f) * df
+
 
 class ExponentFunction(BaseFunction):
+    __slots__ = fields = ('function',)
+
     def __init__(self, fun):
         self.function = fun
 
@@ -666,7 +894,7 @@ class ExponentFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return ExponentFunction(self.function.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -684,7 +912,7 @@ class ExponentFunction(BaseFunction):
 
     def analytical_derivative(self):
         return ProductFunction(
-            self.copy(),
+            self,
             self.function.analytical_derivative()
         )
 
@@ -697,7 +925,7 @@ class ExponentFunction(BaseFunction):
         if has_num(simplified_func, 0):
             return RealNumberFunction(1)
         if is_log(simplified_func):
-            return simplified_func.function.copy()
+            return simplified_func.function
         return ExponentFunction(simplified_func)
 
     def riemann_integral(self, x1, x2, interval=0.001):
@@ -706,8 +934,21 @@ class ExponentFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.apply(np.exp, plan.operand(self.function))
+
+    def evaluate_jet(self, num, n):
+        return jets.exp(self.function.evaluate_jet(num, n))
+
+    def evaluate_with_derivative(self, num):
+        f, df = self.function.evaluate_with_derivative(num)
+        value = np.exp(f)
+        return value, value * df
+
 
 class NaturalLogFunction(BaseFunction):
+    __slots__ = fields = ('function',)
+
     def __init__(self, fun):
         self.function = fun
 
@@ -721,7 +962,7 @@ class NaturalLogFunction(BaseFunction):
         return self.to_string()
 
     def copy(self):
-        return NaturalLogFunction(self.function.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -741,7 +982,7 @@ class NaturalLogFunction(BaseFunction):
         return ProductFunction(
             QuotientFunction(
                 NaturalNumberFunction(1),
-                self.function.copy()
+                self.function
             ),
             self.function.analytical_derivative()
         )
@@ -762,8 +1003,20 @@ class NaturalLogFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.apply(np.log, plan.operand(self.function))
+
+    def evaluate_jet(self, num, n):
+        return jets.log(self.function.evaluate_jet(num, n))
+
+    def evaluate_with_derivative(self, num):
+        f, df = self.function.evaluate_with_derivative(num)
+        return np.log(f), df / f
+
 
 class FactorialFunction(BaseFunction):
+    __slots__ = fields = ('function',)
+
     def __init__(self, fun):
         self.function = fun
 
@@ -771,20 +1024,13 @@ class FactorialFunction(BaseFunction):
         return f'{self.function.to_string()}!'
 
     def evaluate(self, num):
-        if isinstance(num, int) or isinstance(num, float):
-            return np.math.factorial(self.function.evaluate(num))
-
-        temp = []
-        for x in num:
-            temp.append(np.math.factorial(self.function.evaluate(int(x))))
-
-        return np.array(temp)
+        return special.factorial(self.function.evaluate(np.trunc(num)))
 
     def __str__(self):
         return self.to_string()
 
     def copy(self):
-        return FactorialFunction(self.function.copy())
+        return self
 
     def create_graph(self):
         dot = gv.Graph(name='calc')
@@ -815,6 +1061,291 @@ class FactorialFunction(BaseFunction):
         ans = np.sum(y) * interval
         return x, y, ans
 
+    def compile_to(self, plan):
+        return plan.factorial(self.function)
+
+    def evaluate_jet(self, num, n):
+        return jets.constant(self.evaluate(num), num, n)
+
+    def evaluate_with_derivative(self, num):
+        value = self.evaluate(num)
+        return value, np.zeros_like(value)
+
+
+class NarySumFunction(BaseFunction):
+    # Sum of any number of functions in one node, so long sums stay one level deep instead of
+    # becoming a chain of binary sums
+    __slots__ = fields = ('functions',)
+
+    def __init__(self, funs):
+        self.functions = tuple(funs)
+
+    def children(self):
+        return self.functions
+
+    def to_string(self):
+        return f'({" + ".join(fun.to_string() for fun in self.functions)})'
+
+    def evaluate(self, num):
+        result = self.functions[0].evaluate(num)
+        for fun in self.functions[1:]:
+            result = result + fun.evaluate(num)
+        return result
+
+    def __str__(self):
+        return self.to_string()
+
+    def copy(self):
+        return self
+
+    def create_graph(self):
+        dot = gv.Graph(name='calc')
+        index, dot = self.to_graph(1, dot)
+        dot.render('calc.dot')
+        return 'graph.png'
+
+    def to_graph(self, index, dot):
+        tempindex = index
+        dot.node(str(index), '+')
+        index += 1
+        for fun in self.functions:
+            dot.edge(str(tempindex), str(index))
+            index, dot = fun.to_graph(index, dot)
+        return index, dot
+
+    def analytical_derivative(self):
+        return NarySumFunction([fun.analytical_derivative() for fun in self.functions])
+
+    def newton_derivative(self, x, h=0.001):
+        return (self.evaluate(x + h) - self.evaluate(x)) / h
+
+    def simplify(self):
+        constant = 0
+        simplified_funcs = []
+        for fun in self.functions:
+            simplified_func = fun.simplify()
+            if is_number(simplified_func):
+                constant += simplified_func.number
+            else:
+                simplified_funcs.append(simplified_func)
+
+        if constant != 0 or not simplified_funcs:
+            simplified_funcs.append(RealNumberFunction(constant))
+        if len(simplified_funcs) == 1:
+            return simplified_funcs[0]
+        return NarySumFunction(simplified_funcs)
+
+    def riemann_integral(self, x1, x2, interval=0.001):
+        x = np.arange(x1, x2, interval)
+        y = self.evaluate(x)
+        ans = np.sum(y) * interval
+        return x, y, ans
+
+    def compile_to(self, plan):
+        return plan.apply(compiler.add_all, *[plan.operand(fun) for fun in self.functions])
+
+    def evaluate_jet(self, num, n):
+        result = self.functions[0].evaluate_jet(num, n)
+        for fun in self.functions[1:]:
+            result = result + fun.evaluate_jet(num, n)
+        return result
+
+    def evaluate_with_derivative(self, num):
+        value, derivative = self.functions[0].evaluate_with_derivative(num)
+        for fun in self.functions[1:]:
+            f, df = fun.evaluate_with_derivative(num)
+            value, derivative = value + f, derivative + df
+        return value, derivative
+
+
+class NaryProductFunction(BaseFunction):
+    __slots__ = fields = ('functions',)
+
+    def __init__(self, funs):
+        self.functions = tuple(funs)
+
+    def children(self):
+        return self.functions
+
+    def to_string(self):
+        return f'({" * ".join(fun.to_string() for fun in self.functions)})'
+
+    def evaluate(self, num):
+        result = self.functions[0].evaluate(num)
+        for fun in self.functions[1:]:
+            result = result * fun.evaluate(num)
+        return result
+
+    def __str__(self):
+        return self.to_string()
+
+    def copy(self):
+        return self
+
+    def create_graph(self):
+        dot = gv.Graph(name='calc')
+        index, dot = self.to_graph(1, dot)
+        dot.render('calc.dot')
+        return 'graph.png'
+
+    def to_graph(self, index, dot):
+        tempindex = index
+        dot.node(str(index), '*')
+        index += 1
+        for fun in self.functions:
+            dot.edge(str(tempindex), str(index))
+            index, dot = fun.to_graph(index, dot)
+        return index, dot
+
+    def analytical_derivative(self):
+        # Product rule, one term per factor with only that factor differentiated
+        terms = []
+        for i, fun in enumerate(self.functions):
+            terms.append(NaryProductFunction(self.functions[:i] + (fun.analytical_derivative(),) + self.functions[i + 1:]))
+        return NarySumFunction(terms)
+
+    def newton_derivative(self, x, h=0.001):
+        return (self.evaluate(x + h) - self.evaluate(x)) / h
+
+    def simplify(self):
+        constant = 1
+        simplified_funcs = []
+        for fun in self.functions:
+            simplified_func = fun.simplify()
+            if is_number(simplified_func):
+                constant *= simplified_func.number
+            else:
+                simplified_funcs.append(simplified_func)
+
+        if constant == 0:
+            return RealNumberFunction(0)
+        if constant != 1 or not simplified_funcs:
+            simplified_funcs.insert(0, RealNumberFunction(constant))
+        if len(simplified_funcs) == 1:
+            return simplified_funcs[0]
+        return NaryProductFunction(simplified_funcs)
+
+    def riemann_integral(self, x1, x2, interval=0.001):
+        x = np.arange(x1, x2, interval)
+        y = self.evaluate(x)
+        ans = np.sum(y) * interval
+        return x, y, ans
+
+    def compile_to(self, plan):
+        return plan.apply(compiler.multiply_all, *[plan.operand(fun) for fun in self.functions])
+
+    def evaluate_jet(self, num, n):
+        result = self.functions[0].evaluate_jet(num, n)
+        for fun in self.functions[1:]:
+            result = jets.multiply(result, fun.evaluate_jet(num, n))
+        return result
+
+    def evaluate_with_derivative(self, num):
+        value, derivative = self.functions[0].evaluate_with_derivative(num)
+        for fun in self.functions[1:]:
+            f, df = fun.evaluate_with_derivative(num)
+            value, derivative = value * f, derivative * f + value * df
+        return value, derivative
+
+
+class PolynomialFunction(BaseFunction):
+    # Polynomial in (x - center) with the coefficients in ascending order of power. It is one
+    # node however high the degree and evaluates with Horner's scheme.
+    __slots__ = fields = ('coefficients', 'center')
+
+    def __init__(self, coefficients, center=0.):
+        self.coefficients = tuple(float(c) for c in np.ravel(coefficients)) or (0.,)
+        self.center = np.float(center)
+
+    def term_string(self, power):
+        variable = 'x' if self.center == 0 else f'(x - {self.center})'
+        if power == 0:
+            return f'{self.coefficients[0]}'
+        if power == 1:
+            return f'({self.coefficients[1]} * {variable})'
+        return f'({self.coefficients[power]} * ({variable} ^ {power}))'
+
+    def to_string(self):
+        terms = [self.term_string(power) for power, c in enumerate(self.coefficients) if c != 0]
+        if not terms:
+            return '0.0'
+        if len(terms) == 1:
+            return terms[0]
+        return f'({" + ".join(terms)})'
+
+    def evaluate(self, num):
+        t = num - self.center
+        result = np.full_like(t, self.coefficients[-1])
+        for c in self.coefficients[-2::-1]:
+            result = result * t + c
+        return result
+
+    def __str__(self):
+        return self.to_string()
+
+    def copy(self):
+        return self
+
+    def create_graph(self):
+        dot = gv.Graph(name='calc')
+        index, dot = self.to_graph(1, dot)
+        dot.render('calc.dot')
+        return 'graph.png'
+
+    def to_graph(self, index, dot):
+        dot.node(str(index), self.to_string())
+        index += 1
+        return index, dot
+
+    def analytical_derivative(self):
+        return PolynomialFunction([power * c for power, c in enumerate(self.coefficients)][1:], self.center)
+
+    def antiderivative(self):
+        return PolynomialFunction([0.] + [c / (power + 1) for power, c in enumerate(self.coefficients)], self.center)
+
+    def newton_derivative(self, x, h=0.001):
+        return (self.evaluate(x + h) - self.evaluate(x)) / h
+
+    def simplify(self):
+        coefficients = list(self.coefficients)
+        while len(coefficients) > 1 and coefficients[-1] == 0:
+            coefficients.pop()
+        if len(coefficients) == 1:
+            return RealNumberFunction(coefficients[0])
+        return PolynomialFunction(coefficients, self.center)
+
+    def riemann_integral(self, x1, x2, interval=0.001):
+        x = np.arange(x1, x2, interval)
+        y = self.evaluate(x)
+        antiderivative = self.antiderivative()
+        ans = antiderivative.evaluate(np.float(x2)) - antiderivative.evaluate(np.float(x1))
+        return x, y, ans
+
+    def compile_to(self, plan):
+        if len(self.coefficients) == 1:
+            return plan.constant(self.coefficients[0])
+        return plan.apply(self.evaluate, plan.variable())
+
+    def evaluate_jet(self, num, n):
+        return jets.polynomial(self.coefficients, num - self.center, n)
+
+    def evaluate_with_derivative(self, num):
+        t = num - self.center
+        value = np.full_like(t, self.coefficients[-1])
+        derivative = np.zeros_like(t)
+        for c in self.coefficients[-2::-1]:
+            derivative = derivative * t + value
+            value = value * t + c
+        return value, derivative
+
+
+# The leaves that nearly every expression and derivative contains are kept alive here, so
+# they are created once instead of every time the last expression using them is collected.
+CONSTANTS = (
+    VariableFunction(),
+    PiFunction(),
+) + tuple(NaturalNumberFunction(i) for i in range(-2, 11)) + tuple(RealNumberFunction(i) for i in (-1., 0., 0.5, 1., 2.))
+
 
 def are_numbers(first, second):
     return is_number(first) and is_number(second)
@@ -843,37 +1374,107 @@ def is_log(func):
     return isinstance(func, NaturalLogFunction)
 
 
+def derivative(function, n=1):
+    # Start from the highest order that is still cached and only compute the missing ones
+    order = n
+    result = function
+    while order > 0:
+        cached = derivative_cache.get((function, order))
+        if cached is not None:
+            result = cached
+            break
+        order -= 1
+
+    for i in range(order + 1, n + 1):
+        result = result.analytical_derivative().canonicalize()
+        derivative_cache.put((function, i), result)
+    return result
+
+
+def evaluate_many(functions, num):
+    program = compiler.compile_functions(functions)
+    num = np.asarray(num)
+    return np.stack([np.broadcast_to(y, num.shape) for y in program.evaluate_all(num)])
+
+
+def evaluate_cached(function, num):
+    # Opt in memoization of evaluate for callers that evaluate the same functions on the same
+    # grid again. Grids are identified by their contents, so equal arrays share entries. The
+    # results are read only because they are handed out to every caller.
+    num = np.asarray(num)
+    key = (function, fingerprint(num))
+    result = evaluation_cache.get(key)
+    if result is None:
+        result = np.array(np.broadcast_to(function.evaluate(num), num.shape))
+        result.setflags(write=False)
+        evaluation_cache.put(key, result)
+    return result
+
+
+def fingerprint(num):
+    return num.dtype.str, num.shape, hashlib.blake2b(np.ascontiguousarray(num).data, digest_size=16).digest()
+
+
+def set_evaluation_cache_size(max_bytes):
+    evaluation_cache.resize(max_bytes)
+
+
+def count_nodes(function):
+    seen = {function}
+    stack = [function]
+    while stack:
+        for child in stack.pop().children():
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return len(seen)
+
+
+def tree_size(function):
+    # Size of the expression written out as a tree, without expanding shared subtrees
+    sizes = {}
+    stack = [function]
+    while stack:
+        func = stack[-1]
+        pending = [child for child in func.children() if child not in sizes]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        sizes[func] = 1 + sum(sizes[child] for child in func.children())
+    return sizes[function]
+
+
 def taylor_analytical(function, n=8, a=0.):
     if n == 0:
         return function
 
-    derivative = function.analytical_derivative().simplify()
-    taylor_functions = [taylorify(derivative, 1, a)]
-    for i in range(n - 1):
-        derivative = derivative.analytical_derivative().simplify()
-        taylor_functions.append(taylorify(derivative, i + 2, a))
-
-    return SumFunction(RealNumberFunction(function.evaluate(a)), sum_all(taylor_functions)).simplify()
+    a = float(a)
+    coefficients = [function.evaluate(a)] + [taylor_coefficient(function.derivative(i), i, a) for i in range(1, n + 1)]
+    return PolynomialFunction(coefficients, a)
 
 
 def taylor_newton(function, x, n=8, a=0):
+    # Numeric coefficients from one batched evaluation of the function itself, no derivatives
     a = float(a)
-    taylor_functions = [taylorify(RealNumberFunction(function.newton_derivative(a)), 1, a)]
-    derivative = function.analytical_derivative().simplify()
-    for i in range(2, n + 1):
-        taylor_functions.append(taylorify(RealNumberFunction(derivative.newton_derivative(a)), i, a))
-        derivative = derivative.analytical_derivative().simplify()
-
-    s = SumFunction(RealNumberFunction(function.evaluate(a)), sum_all(taylor_functions)).simplify()
+    s = PolynomialFunction(differentiation.taylor_coefficients(function, n, a), a)
     print(s)
     return s.evaluate(x)
 
 
+def taylor_automatic(function, n=8, a=0.):
+    return PolynomialFunction(function.taylor_coefficients(n, a), a)
+
+
+def taylor_coefficient(function, n, a):
+    return function.evaluate(a) / special.factorial(n)
+
+
 def sum_all(functions):
     if len(functions) == 1:
         return functions[0]
 
-    return SumFunction(functions[0], sum_all(functions[1:]))
+    return NarySumFunction(functions)
 
 
 def taylorify(function, n, a):
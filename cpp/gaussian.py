@@ -4,70 +4,152 @@ from . import functions
 
 
 def from_string(coordinates_str):
+    return Interpolation(parse_coordinates(coordinates_str)).to_function()
+
+
+def parse_coordinates(coordinates_str):
     coordinates_str = coordinates_str.split(';')
     coordinates = []
     for s in coordinates_str:
         s = s.split(',')
         coordinates.append(s)
-    coordinates = np.array(coordinates, dtype=np.float)
-    matrix = create_matrix(coordinates)
-    values = gaussian_elimination(matrix)
-    return create_function(values)
+    return np.array(coordinates, dtype=np.float)
+
+
+class Interpolation:
+    # Barycentric form of the interpolating polynomial. Building the weights takes O(n^2),
+    # evaluating takes O(n) per point and adding a point only updates the weights in O(n)
+    # instead of solving the whole system again.
+    def __init__(self, coordinates):
+        coordinates = np.asarray(coordinates, dtype=np.float).reshape(-1, 2)
+        self.x = coordinates[:, 0].copy()
+        self.y = coordinates[:, 1].copy()
+        if len(np.unique(self.x)) != len(self.x):
+            raise ValueError('x coordinates have to be unique')
+
+        # The weights are kept as logarithms and signs, products of thousands of differences
+        # do not fit in a float even when the weights themselves do.
+        differences = self.x[:, np.newaxis] - self.x
+        np.fill_diagonal(differences, 1.)
+        self.log_weights = -np.sum(np.log(np.abs(differences)), axis=1)
+        self.signs = np.prod(np.sign(differences), axis=1)
+        self.update_weights()
+
+    def __len__(self):
+        return len(self.x)
+
+    def add_point(self, x, y):
+        x = float(x)
+        if np.any(self.x == x):
+            raise ValueError(f'There already is a point with x = {x}')
+
+        differences = self.x - x
+        log_differences = np.log(np.abs(differences))
+        self.log_weights = np.append(self.log_weights - log_differences, -np.sum(log_differences))
+        self.signs = np.append(self.signs * np.sign(differences), np.prod(-np.sign(differences)))
+        self.update_weights()
+        self.x = np.append(self.x, x)
+        self.y = np.append(self.y, float(y))
+
+    def update_weights(self):
+        # Multiplying all weights by the same number does not change the interpolation
+        shift = np.max(self.log_weights) if len(self.log_weights) else 0.
+        self.weights = self.signs * np.exp(self.log_weights - shift)
+
+    def evaluate(self, num):
+        num = np.asarray(num, dtype=np.float)
+        if len(self) == 0:
+            return np.zeros(num.shape)
+        numerator = np.zeros(num.shape)
+        denominator = np.zeros(num.shape)
+        exact = np.full(num.shape, -1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for j in range(len(self)):
+                difference = num - self.x[j]
+                exact[difference == 0] = j
+                term = self.weights[j] / difference
+                numerator += term * self.y[j]
+                denominator += term
+            result = numerator / denominator
+
+        # Points on a node would divide by zero, they get the value of the node
+        return np.where(exact >= 0, self.y[exact], result)
+
+    def __call__(self, num):
+        return self.evaluate(num)
+
+    def polynomial(self):
+        # Coefficients in the monomial basis with the highest power first, like gaussian_elimination.
+        # They go through the Newton divided differences, which also takes O(n^2).
+        n = len(self)
+        table = self.y.copy()
+        newton = np.empty(n)
+        for j in range(n):
+            if j > 0:
+                table[j:] = (table[j:] - table[j - 1:-1]) / (self.x[j:] - self.x[:-j])
+            newton[j] = table[j]
+
+        values = np.zeros(0)
+        for k in range(n - 1, -1, -1):
+            values = np.append(values, 0.) - np.append(0., values * self.x[k])
+            values[-1] += newton[k]
+        return values
+
+    def to_function(self):
+        return create_function(self.polynomial())
 
 
 def create_matrix(coordinates):
-    matrix = []
-    for coordinate in coordinates:
-        matrix.append(create_matrix_row(coordinate, len(coordinates)))
-    return np.array(matrix, dtype=np.float)
+    # Works on a single set of coordinates (n, 2) as well as a stack of them (k, n, 2)
+    coordinates = np.asarray(coordinates, dtype=np.float)
+    x = coordinates[..., 0, np.newaxis]
+    powers = np.arange(coordinates.shape[-2] - 1, -1, -1)
+    return np.concatenate([x ** powers, coordinates[..., 1:2]], axis=-1)
 
 
 def create_matrix_row(coordinate, n):
-    row = []
-    for i in range(n - 1, -1, -1):
-        row.append(coordinate[0] ** i)
+    row = list(np.vander([coordinate[0]], n)[0])
     row.append(coordinate[1])
     return row
 
 
+def solve_many(coordinates):
+    # Coefficients of the interpolating polynomial for every set of coordinates in the stack
+    return gaussian_elimination(create_matrix(coordinates))
+
+
 def create_function(values):
-    terms = []
-    for index, item in enumerate(values):
-        terms.append(
-            functions.ProductFunction(
-                functions.RealNumberFunction(item),
-                functions.PowerFunction(
-                    functions.VariableFunction(),
-                    functions.NaturalNumberFunction((len(values) - 1) - index)
-                )
-            )
-        )
-    return functions.sum_all(terms)
+    # values has the highest power first, like the columns of the matrix
+    return functions.PolynomialFunction(np.asarray(values)[::-1])
 
 
 def gaussian_elimination(matrix):
-    row_count, column_count = matrix.shape
+    # Solves one augmented matrix (n, n + 1) or a stack of them (k, n, n + 1). Each step
+    # updates the remaining rows of all matrices at once instead of element by element.
+    matrix = np.array(matrix, dtype=np.float)
+    single = matrix.ndim == 2
+    if single:
+        matrix = matrix[np.newaxis]
+    row_count, column_count = matrix.shape[-2:]
     assert column_count == row_count + 1, 'Matrix not in the right size'
 
+    stacks = np.arange(len(matrix))
     for h in range(row_count):
-        max_i = np.argmax([np.abs(matrix[i, h]) for i in range(h, row_count)]) + h
+        max_i = np.argmax(np.abs(matrix[:, h:, h]), axis=1) + h
 
-        assert matrix[max_i, h] != 0, 'Matrix is singular!'
+        assert np.all(matrix[stacks, max_i, h] != 0), 'Matrix is singular!'
 
-        matrix[[max_i, h]] = matrix[[h, max_i]]
+        pivot_rows = matrix[stacks, max_i].copy()
+        matrix[stacks, max_i] = matrix[:, h]
+        matrix[:, h] = pivot_rows
 
-        for i in range(h + 1, row_count):
-            f = matrix[i, h] / matrix[h, h]
-            for j in range(h + 1, column_count):
-                matrix[i, j] -= matrix[h, j] * f
-            matrix[i, h] = 0
+        f = matrix[:, h + 1:, h] / matrix[:, h, h, np.newaxis]
+        matrix[:, h + 1:, h:] -= f[:, :, np.newaxis] * matrix[:, np.newaxis, h, h:]
 
-    x = []
+    x = np.empty(matrix.shape[:2])
     for i in range(row_count - 1, -1, -1):
-        x.insert(0, matrix[i, row_count] / matrix[i, i])
-        for h in range(i - 1, -1, -1):
-            matrix[h, row_count] -= matrix[h, i] * x[0]
-    return np.array(x, dtype=np.float)
+        x[:, i] = (matrix[:, i, row_count] - np.sum(matrix[:, i, i + 1:row_count] * x[:, i + 1:], axis=1)) / matrix[:, i, i]
+    return x[0] if single else x
 
 
 if __name__ == '__main__':
@@ -0,0 +1,115 @@
+import threading
+
+import numpy as np
+
+from . import cache, sampling
+
+
+class GridCache:
+    # Samples of functions on a pyramid of grids. Level l holds the points k * base_step * 2^l,
+    # so every point of a level is also a point of all finer levels and the x values are
+    # exactly equal between levels. Each level keeps one contiguous run of samples per
+    # function. Asking for a wider range only evaluates the newly exposed points and a range
+    # that does not touch the run replaces it. Points that another level already has are
+    # copied instead of evaluated. The points adaptive sampling adds are kept too, up to
+    # max_refined per function, so zooming back and forth does not refine the same curve again.
+    def __init__(self, base_step=1e-4, levels=24, max_functions=16, max_refined=1 << 16):
+        self.base_step = base_step
+        self.levels = levels
+        self.max_refined = max_refined
+        self.samples = cache.LRUCache(max_functions)
+        self.refined = cache.LRUCache(max_functions)
+        self.evaluations = 0
+        self._lock = threading.Lock()
+
+    def level(self, step):
+        # Coarsest level that is at least as fine as step
+        level = int(np.floor(np.log2(max(step, self.base_step) / self.base_step)))
+        return min(max(level, 0), self.levels - 1)
+
+    def step(self, level):
+        return self.base_step * 2. ** level
+
+    def sample(self, function, lo, hi, step):
+        with self._lock:
+            return self._sample(function, lo, hi, step)
+
+    def sample_adaptive(self, function, lo, hi, max_points, y_range=None):
+        with self._lock:
+            x, y = self._sample(function, lo, hi, (hi - lo) / sampling.INITIAL_POINTS)
+            known_x, known_y = self.refined.get(function) or (np.zeros(0), np.zeros(0))
+            inside = (known_x >= lo) & (known_x <= hi)
+            x, unique = np.unique(np.concatenate([x, known_x[inside]]), return_index=True)
+            y = np.concatenate([y, known_y[inside]])[unique]
+            refined_x, refined_y = sampling.adaptive(function, lo, hi, max_points, (x, y), y_range)
+            self.evaluations += len(refined_x) - len(x)
+
+            if len(refined_x) > len(x):
+                known_x, unique = np.unique(np.concatenate([refined_x, known_x]), return_index=True)
+                known_y = np.concatenate([refined_y, known_y])[unique]
+                if len(known_x) > self.max_refined:
+                    known_x, known_y = refined_x, refined_y
+                self.refined.put(function, (known_x, known_y))
+            return refined_x, refined_y
+
+    def _sample(self, function, lo, hi, step):
+        level = self.level(step)
+        level_step = self.step(level)
+        first = int(np.ceil(lo / level_step))
+        last = int(np.floor(hi / level_step))
+        if last < first:
+            return np.zeros(0), np.zeros(0)
+
+        runs = self.samples.get(function)
+        if runs is None:
+            runs = {}
+            self.samples.put(function, runs)
+
+        start, values = runs.get(level, (first, np.zeros(0)))
+        stop = start + len(values)
+        if first > stop or last + 1 < start:
+            # Filling the gap to a range that does not touch the run would evaluate points
+            # nobody asked for, so the run moves to the new range instead
+            start, stop, values = first, first, np.zeros(0)
+        new_start = min(start, first)
+        new_stop = max(stop, last + 1)
+        if new_start < start or new_stop > stop:
+            left = self.compute(function, runs, level, new_start, start)
+            right = self.compute(function, runs, level, stop, new_stop)
+            values = np.concatenate([left, values, right])
+            runs[level] = (new_start, values)
+            start = new_start
+
+        x = np.arange(first, last + 1) * level_step
+        return x, values[first - start:last + 1 - start]
+
+    def compute(self, function, runs, level, first, stop):
+        indices = np.arange(first, stop)
+        y = np.full(len(indices), np.nan)
+        known = np.zeros(len(indices), dtype=bool)
+        for other, (other_start, other_values) in runs.items():
+            if other == level or len(other_values) == 0:
+                continue
+            # Index k on this level is index k * 2^(level - other) on the other level
+            if other < level:
+                mapped = indices * 2 ** (level - other)
+                usable = np.ones(len(indices), dtype=bool)
+            else:
+                factor = 2 ** (other - level)
+                mapped = indices // factor
+                usable = indices % factor == 0
+            mapped = mapped - other_start
+            usable &= (mapped >= 0) & (mapped < len(other_values)) & ~known
+            y[usable] = other_values[mapped[usable]]
+            known |= usable
+
+        missing = ~known
+        if np.any(missing):
+            x = indices[missing] * self.step(level)
+            y[missing] = np.broadcast_to(function.compile()(x), x.shape)
+            self.evaluations += len(x)
+        return y
+
+    def clear(self):
+        self.samples.clear()
+        self.refined.clear()
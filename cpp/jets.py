@@ -0,0 +1,111 @@
+import numpy as np
+
+# A jet holds the Taylor coefficients [f, f', f''/2!, ..., f^(n)/n!] of a function at
+# every expansion point, stacked along the first axis. All rules below are the usual
+# truncated power series recurrences and cost O(n^2) per node.
+
+
+def constant(value, num, n):
+    jet = np.zeros((n + 1,) + np.shape(num))
+    jet[0] = value
+    return jet
+
+
+def variable(num, n):
+    jet = constant(num, num, n)
+    if n > 0:
+        jet[1] = 1.
+    return jet
+
+
+def multiply(a, b):
+    c = np.zeros(np.broadcast(a, b).shape)
+    for k in range(len(c)):
+        c[k] = np.sum(a[:k + 1] * b[k::-1], axis=0)
+    return c
+
+
+def divide(a, b):
+    c = np.zeros(np.broadcast(a, b).shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c[0] = a[0] / b[0]
+        for k in range(1, len(c)):
+            c[k] = (a[k] - np.sum(b[1:k + 1] * c[k - 1::-1], axis=0)) / b[0]
+    return c
+
+
+def exp(u):
+    e = np.zeros(u.shape)
+    e[0] = np.exp(u[0])
+    for k in range(1, len(e)):
+        e[k] = np.sum(weights(k, u.ndim) * u[1:k + 1] * e[k - 1::-1], axis=0) / k
+    return e
+
+
+def log(u):
+    result = np.zeros(u.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[0] = np.log(u[0])
+        for k in range(1, len(result)):
+            total = np.sum(weights(k - 1, u.ndim) * result[1:k] * u[k - 1:0:-1], axis=0) if k > 1 else 0.
+            result[k] = (u[k] - total / k) / u[0]
+    return result
+
+
+def sin_cos(u):
+    s = np.zeros(u.shape)
+    c = np.zeros(u.shape)
+    s[0] = np.sin(u[0])
+    c[0] = np.cos(u[0])
+    for k in range(1, len(s)):
+        du = weights(k, u.ndim) * u[1:k + 1]
+        s[k] = np.sum(du * c[k - 1::-1], axis=0) / k
+        c[k] = -np.sum(du * s[k - 1::-1], axis=0) / k
+    return s, c
+
+
+def power(a, b):
+    if np.any(b[1:] != 0):
+        # f ^ g = e ^ (g * ln(f))
+        return exp(multiply(b, log(a)))
+
+    exponent = b[0]
+    if np.all(exponent == exponent.flat[0]) and float(exponent.flat[0]).is_integer() and exponent.flat[0] >= 0:
+        return integer_power(a, int(exponent.flat[0]))
+
+    c = np.zeros(np.broadcast(a, b).shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c[0] = a[0] ** exponent
+        for k in range(1, len(c)):
+            j = weights(k, a.ndim)
+            c[k] = np.sum(((exponent + 1) * j - k) * a[1:k + 1] * c[k - 1::-1], axis=0) / (k * a[0])
+    return c
+
+
+def integer_power(a, m):
+    result = constant(1., a[0], len(a) - 1)
+    while m:
+        if m & 1:
+            result = multiply(result, a)
+        m >>= 1
+        if m:
+            a = multiply(a, a)
+    return result
+
+
+def polynomial(coefficients, t, n):
+    # Repeated synthetic division by (x - t), every remainder is the next Taylor coefficient.
+    # Coefficients are in ascending order of power.
+    jet = np.zeros((n + 1,) + np.shape(t))
+    b = list(coefficients)
+    for k in range(min(n + 1, len(b))):
+        for i in range(len(b) - 2, -1, -1):
+            b[i] = b[i + 1] * t + b[i]
+        jet[k] = b[0]
+        b = b[1:]
+    return jet
+
+
+def weights(k, ndim):
+    # 1..k shaped to broadcast against k stacked coefficients
+    return np.arange(1., k + 1.).reshape((k,) + (1,) * (ndim - 1))
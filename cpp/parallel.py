@@ -0,0 +1,82 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+MIN_CHUNK_SIZE = 1 << 16
+
+
+def chunk_bounds(size, workers, chunk_size=None):
+    if chunk_size is None:
+        # A few chunks per worker keeps them busy when some chunks are slower than others
+        chunk_size = max(MIN_CHUNK_SIZE, -(-size // (4 * workers)))
+    return [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+
+def evaluate_parallel(function, x, workers=None, chunk_size=None, mode='thread'):
+    # Threads are enough for everything that ends up in NumPy ufuncs, which release the GIL.
+    # Processes share the input and output buffers through memory mapped files instead.
+    workers = workers or os.cpu_count() or 1
+    x = np.asarray(x, dtype=np.float64)
+    bounds = chunk_bounds(x.size, workers, chunk_size)
+
+    if mode == 'thread':
+        return _evaluate_threads(function, x, workers, bounds)
+    if mode == 'process':
+        return _evaluate_processes(function, x, workers, bounds)
+    raise ValueError(f'{mode} is not a valid mode, use thread or process')
+
+
+def _evaluate_threads(function, x, workers, bounds):
+    program = function.compile()
+    flat_x = x.ravel()
+    out = np.empty(x.size)
+
+    def evaluate(bound):
+        start, stop = bound
+        out[start:stop] = program(flat_x[start:stop])
+
+    if len(bounds) <= 1 or workers == 1:
+        for bound in bounds:
+            evaluate(bound)
+    else:
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(evaluate, bounds))
+    return out.reshape(x.shape)
+
+
+def _evaluate_processes(function, x, workers, bounds):
+    # Memory mapped files work on every Python version, multiprocessing.shared_memory needs 3.8
+    with tempfile.TemporaryDirectory() as directory:
+        x_path = os.path.join(directory, 'x')
+        out_path = os.path.join(directory, 'out')
+        shared_x = np.memmap(x_path, dtype=np.float64, mode='w+', shape=(max(x.size, 1),))
+        shared_x[:x.size] = x.ravel()
+        shared_x.flush()
+        shared_out = np.memmap(out_path, dtype=np.float64, mode='w+', shape=(max(x.size, 1),))
+        try:
+            with ProcessPoolExecutor(workers) as executor:
+                jobs = [
+                    executor.submit(_evaluate_shared, function, x_path, out_path, x.size, start, stop)
+                    for start, stop in bounds
+                ]
+                for job in jobs:
+                    job.result()
+            return np.array(shared_out[:x.size]).reshape(x.shape)
+        finally:
+            # The files cannot be removed on Windows while they are still mapped
+            del shared_x, shared_out
+
+
+_programs = {}
+
+
+def _evaluate_shared(function, x_path, out_path, size, start, stop):
+    if function not in _programs:
+        _programs[function] = function.compile()
+    x = np.memmap(x_path, dtype=np.float64, mode='r', shape=(max(size, 1),))
+    out = np.memmap(out_path, dtype=np.float64, mode='r+', shape=(max(size, 1),))
+    out[start:stop] = _programs[function](x[start:stop])
+    out.flush()
+    del x, out
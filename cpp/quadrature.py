@@ -0,0 +1,85 @@
+from collections import namedtuple
+
+import numpy as np
+
+Integral = namedtuple('Integral', ['value', 'error', 'evaluations'])
+
+# 15 point Gauss-Kronrod rule with the embedded 7 point Gauss rule
+_KRONROD_NODES = np.array([
+    0.991455371120812639206854697526329,
+    0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926,
+    0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013,
+    0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245,
+    0.000000000000000000000000000000000,
+])
+_KRONROD_WEIGHTS = np.array([
+    0.022935322010529224963732008058970,
+    0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518,
+    0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550,
+    0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649,
+    0.209482141084727828012999174891714,
+])
+_GAUSS_WEIGHTS = np.array([
+    0.,
+    0.129484966168869693270611432679082,
+    0.,
+    0.279705391489276667901467771423780,
+    0.,
+    0.381830050505118944950369775488975,
+    0.,
+    0.417959183673469387755102040816327,
+])
+
+NODES = np.concatenate([-_KRONROD_NODES[:-1], _KRONROD_NODES[::-1]])
+KRONROD_WEIGHTS = np.concatenate([_KRONROD_WEIGHTS[:-1], _KRONROD_WEIGHTS[::-1]])
+GAUSS_WEIGHTS = np.concatenate([_GAUSS_WEIGHTS[:-1], _GAUSS_WEIGHTS[::-1]])
+
+
+def integrate(function, x1, x2, tol=1e-10, max_panels=10000):
+    # Panels that do not meet their share of the tolerance are halved. All panels that are
+    # still open are evaluated together in a single call per pass.
+    program = function.compile()
+    x1 = float(x1)
+    x2 = float(x2)
+    length = abs(x2 - x1)
+
+    value = 0.
+    error = 0.
+    evaluations = 0
+    accepted = 0
+    panels = np.array([[x1, x2]])
+    while len(panels) and length > 0:
+        centers = (panels[:, 0] + panels[:, 1]) / 2
+        half_widths = (panels[:, 1] - panels[:, 0]) / 2
+        x = centers[:, np.newaxis] + half_widths[:, np.newaxis] * NODES
+        with np.errstate(all='ignore'):
+            y = np.broadcast_to(program(x.ravel()), (x.size,)).reshape(x.shape)
+        evaluations += x.size
+
+        kronrod = y @ KRONROD_WEIGHTS * half_widths
+        errors = np.abs(kronrod - y @ GAUSS_WEIGHTS * half_widths)
+
+        local_tol = tol * np.abs(2 * half_widths) / length
+        too_small = np.abs(half_widths) <= 4 * np.finfo(float).eps * np.maximum(np.abs(centers), 1.)
+        done = (errors <= local_tol) | too_small
+        if accepted + np.count_nonzero(done) + 2 * np.count_nonzero(~done) > max_panels:
+            done[:] = True
+
+        value += np.sum(kronrod[done])
+        error += np.sum(errors[done])
+        accepted += np.count_nonzero(done)
+
+        remaining = panels[~done]
+        middle = (remaining[:, 0] + remaining[:, 1]) / 2
+        panels = np.concatenate([
+            np.stack([remaining[:, 0], middle], axis=1),
+            np.stack([middle, remaining[:, 1]], axis=1),
+        ])
+
+    return Integral(value, error, evaluations)
@@ -1,98 +1,165 @@
-from . import functions
+from . import cache, functions
+
+BINARY = {
+    '+': functions.SumFunction,
+    '-': functions.DifferenceFunction,
+    '*': functions.ProductFunction,
+    '/': functions.QuotientFunction,
+    '^': functions.PowerFunction,
+}
+UNARY = {
+    's': functions.SineFunction,
+    'c': functions.CosineFunction,
+    'e': functions.ExponentFunction,
+    'l': functions.NaturalLogFunction,
+    '!': functions.FactorialFunction,
+}
+NUMBER_FUNCTIONS = {
+    'n': functions.NaturalNumberFunction,
+    'r': functions.RealNumberFunction,
+}
+SYMBOLS = set(BINARY) | set(UNARY) | set(NUMBER_FUNCTIONS) | {'x', 'p', '(', ')', ','}
+NUMBER_CHARACTERS = set('0123456789.')
+
+parse_cache = cache.LRUCache(1024)
+compile_cache = cache.LRUCache(1024)
 
 
 def read(formula):
     if (not isinstance(formula, str)) or len(formula) == 0 or formula.isspace():
         raise ValueError(f'{formula} is not of value string or is size 0')
 
-    func, _ = _read(formula.replace(' ', ''))
+    tokens = tokenize(formula)
+    key = normalize(tokens)
+    func = parse_cache.get(key)
+    if func is None:
+        func = Parser(formula, tokens).parse()
+        parse_cache.put(key, func)
     return func
 
 
-def _read(formula):
-    firstchar, formula = getfirstchar(formula)
-
-    # No switches in Python :(
-    if firstchar == 'x':
-        before, formula = readuntil(formula, ',', ')')
-        return functions.VariableFunction(), formula
-    elif firstchar.isnumeric():
-        before, formula = readuntil(formula, ',', ')')
-        num = firstchar + before
-        if '.' in num:
-            return functions.RealNumberFunction(num), formula
-        return functions.NaturalNumberFunction(num), formula
-    elif firstchar == 'n':
-        num, formula = readuntil(formula[1:], ')', '.')
-        return functions.NaturalNumberFunction(num), formula
-    elif firstchar == 'r':
-        num, formula = readuntil(formula[1:], ')')
-        return functions.RealNumberFunction(num), formula
-    elif firstchar == 'p':
-        before, formula = readuntil(formula, ',', ')')
-        return functions.PiFunction(), formula
-    elif firstchar == '+':
-        _, formula = readuntil(formula, '(')
-        firstFunc, formula = _read(formula[1:])
-        before, formula = readuntil(formula, ',')
-        secondFunc, formula = _read(formula[1:])
-        return functions.SumFunction(firstFunc, secondFunc), formula
-    elif firstchar == '-':
-        _, formula = readuntil(formula, '(')
-        firstFunc, formula = _read(formula[1:])
-        before, formula = readuntil(formula, ',')
-        secondFunc, formula = _read(formula[1:])
-        return functions.DifferenceFunction(firstFunc, secondFunc), formula
-    elif firstchar == '*':
-        _, formula = readuntil(formula, '(')
-        firstFunc, formula = _read(formula[1:])
-        before, formula = readuntil(formula, ',')
-        secondFunc, formula = _read(formula[1:])
-        return functions.ProductFunction(firstFunc, secondFunc), formula
-    elif firstchar == '/':
-        _, formula = readuntil(formula, '(')
-        firstFunc, formula = _read(formula[1:])
-        before, formula = readuntil(formula, ',')
-        secondFunc, formula = _read(formula[1:])
-        return functions.QuotientFunction(firstFunc, secondFunc), formula
-    elif firstchar == '^':
-        _, formula = readuntil(formula, '(')
-        firstFunc, formula = _read(formula[1:])
-        before, formula = readuntil(formula, ',')
-        secondFunc, formula = _read(formula[1:])
-        return functions.PowerFunction(firstFunc, secondFunc), formula
-    elif firstchar == 's':
-        _, formula = readuntil(formula, '(')
-        func, formula = _read(formula[1:])
-        return functions.SineFunction(func), formula
-    elif firstchar == 'c':
-        _, formula = readuntil(formula, '(')
-        func, formula = _read(formula[1:])
-        return functions.CosineFunction(func), formula
-    elif firstchar == 'e':
-        _, formula = readuntil(formula, '(')
-        func, formula = _read(formula[1:])
-        return functions.ExponentFunction(func), formula
-    elif firstchar == 'l':
-        _, formula = readuntil(formula, '(')
-        func, formula = _read(formula[1:])
-        return functions.NaturalLogFunction(func), formula
-    elif firstchar == '!':
-        _, formula = readuntil(formula, '(')
-        func, formula = _read(formula[1:])
-        return functions.FactorialFunction(func), formula
-
-
-def getfirstchar(f):
-    first = f[:1]
-    f = f[1:]
-    return first, f
-
-
-def readuntil(f, *until):
-    for i, x in enumerate(f):
-        for y in until:
-            if x == y:
-                return f[:i], f[i:]
-
-    return f, f
+def read_compiled(formula):
+    func = read(formula)
+    program = compile_cache.get(func)
+    if program is None:
+        program = func.compile()
+        compile_cache.put(func, program)
+    return program
+
+
+def normalize(tokens):
+    # The token texts, so formulas that only differ in spacing between tokens share an entry
+    # while '1 2' and '12' do not
+    return tuple(text for text, _ in tokens)
+
+
+def cache_info():
+    return parse_cache.info(), compile_cache.info()
+
+
+def clear_cache():
+    parse_cache.clear()
+    compile_cache.clear()
+
+
+def set_cache_size(maxsize):
+    parse_cache.resize(maxsize)
+    compile_cache.resize(maxsize)
+
+
+def tokenize(formula):
+    # Tokens are (text, position) pairs, the position is the index in the original formula
+    tokens = []
+    i = 0
+    while i < len(formula):
+        char = formula[i]
+        if char.isspace():
+            i += 1
+        elif char in NUMBER_CHARACTERS:
+            start = i
+            while i < len(formula) and formula[i] in NUMBER_CHARACTERS:
+                i += 1
+            tokens.append((formula[start:i], start))
+        elif char in SYMBOLS:
+            tokens.append((char, i))
+            i += 1
+        else:
+            raise ValueError(f"Unexpected character '{char}' at position {i}")
+    return tokens
+
+
+class Parser:
+    def __init__(self, formula, tokens=None):
+        self.formula = formula
+        self.tokens = tokenize(formula) if tokens is None else tokens
+        self.index = 0
+
+    def parse(self):
+        # Operators waiting for their operands are kept on an explicit stack instead of
+        # recursing, so the nesting depth of a formula is not limited by the recursion limit.
+        stack = []
+        while True:
+            text, position = self.next('an expression')
+            if text in BINARY or text in UNARY:
+                self.expect('(')
+                stack.append((text, 2 if text in BINARY else 1, []))
+                continue
+
+            func = self.leaf(text, position)
+            while stack:
+                operator, arity, operands = stack[-1]
+                operands.append(func)
+                if len(operands) < arity:
+                    self.expect(',')
+                    break
+                self.expect(')')
+                stack.pop()
+                func = (BINARY.get(operator) or UNARY[operator])(*operands)
+            else:
+                break
+
+        if self.index < len(self.tokens):
+            text, position = self.tokens[self.index]
+            raise ValueError(f"Unexpected '{text}' at position {position}, expected the end of the formula")
+        return func
+
+    def leaf(self, text, position):
+        if text == 'x':
+            return functions.VariableFunction()
+        elif text == 'p':
+            return functions.PiFunction()
+        elif text[0] in NUMBER_CHARACTERS:
+            number = self.number(text, position)
+            if '.' in text:
+                return functions.RealNumberFunction(number)
+            return functions.NaturalNumberFunction(text)
+        elif text in NUMBER_FUNCTIONS:
+            number_function = NUMBER_FUNCTIONS[text]
+            self.expect('(')
+            text, position = self.next('a number')
+            sign = 1.
+            if text == '-':
+                sign = -1.
+                text, position = self.next('a number')
+            number = sign * self.number(text, position)
+            self.expect(')')
+            return number_function(number)
+        raise ValueError(f"Unexpected '{text}' at position {position}, expected an expression")
+
+    def number(self, text, position):
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f"'{text}' at position {position} is not a number") from None
+
+    def next(self, expected):
+        if self.index >= len(self.tokens):
+            raise ValueError(f'Expected {expected} at position {len(self.formula)} but the formula ended')
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def expect(self, expected):
+        text, position = self.next(f"'{expected}'")
+        if text != expected:
+            raise ValueError(f"Expected '{expected}' at position {position} but found '{text}'")
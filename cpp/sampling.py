@@ -0,0 +1,86 @@
+import numpy as np
+
+INITIAL_POINTS = 65
+
+
+def adaptive(function, lo, hi, max_points=800, initial=None, y_range=None, tol=1e-3, max_passes=16):
+    # Starts from a coarse grid, or the given (x, y) samples, and halves the intervals where
+    # the curve bends or becomes undefined until it is straight to within tol of the height
+    # of the view or max_points is reached. When there is not enough budget left for every
+    # interval, the ones that are off the most are refined first.
+    program = function.compile()
+    if initial is None:
+        x = np.linspace(lo, hi, max(min(max_points, INITIAL_POINTS), 2))
+        y = evaluate(program, x)
+    else:
+        x, y = (np.array(samples, dtype=np.float64) for samples in initial)
+
+    min_width = (hi - lo) * 1e-9
+    for _ in range(max_passes):
+        budget = max_points - len(x)
+        if budget <= 0 or len(x) < 3:
+            break
+        scores = interval_scores(x, y, y_range, tol)
+        scores[np.diff(x) <= min_width] = 0.
+        refine = np.flatnonzero(scores)
+        if len(refine) == 0:
+            break
+        if len(refine) > budget:
+            refine = np.sort(refine[np.argsort(-scores[refine], kind='stable')[:budget]])
+
+        middle = (x[refine] + x[refine + 1]) / 2
+        x = np.insert(x, refine + 1, middle)
+        y = np.insert(y, refine + 1, evaluate(program, middle))
+    return x, y
+
+
+def evaluate(program, x):
+    with np.errstate(all='ignore'):
+        return np.array(np.broadcast_to(program(x), x.shape), dtype=np.float64)
+
+
+def interval_scores(x, y, y_range=None, tol=1e-3):
+    # How far each interval is from a straight line, relative to the height of the view. Values
+    # outside the view are clipped just past its edges, so poles do not take all the points.
+    finite = np.isfinite(y)
+    if y_range is not None:
+        bottom, top = y_range
+        scale = top - bottom
+        y = np.clip(y, bottom - scale / 10, top + scale / 10)
+    else:
+        scale = np.ptp(y[finite]) if np.any(finite) else 0.
+    scale = scale if scale > 0 else 1.
+
+    scores = np.zeros(len(x) - 1)
+    with np.errstate(all='ignore'):
+        t = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+        deviation = np.abs(y[1:-1] - (y[:-2] + t * (y[2:] - y[:-2]))) / scale
+    deviation[~(finite[:-2] & finite[1:-1] & finite[2:])] = 0.
+    bent = np.where(deviation > tol, deviation, 0.)
+    scores[:-1] = bent
+    scores[1:] = np.maximum(scores[1:], bent)
+
+    # Intervals where the function starts or stops being defined
+    scores[finite[:-1] != finite[1:]] = 1.
+    return scores
+
+
+def decimate(x, y, width):
+    # Keeps the first, last, lowest and highest sample of every pixel column, so drawing
+    # the result looks the same as drawing every sample, spikes included
+    x = np.asarray(x)
+    y = np.asarray(y)
+    width = max(int(width), 1)
+    if len(x) <= 4 * width or x[-1] == x[0]:
+        return x, y
+
+    columns = np.clip(((x - x[0]) / (x[-1] - x[0]) * width).astype(int), 0, width - 1)
+    starts = np.flatnonzero(np.diff(columns)) + 1
+    firsts = np.concatenate([[0], starts])
+    lasts = np.concatenate([starts - 1, [len(x) - 1]])
+    # NaN sorts past both ends so it is never picked as an extreme of a column with numbers
+    nan = np.isnan(y)
+    lowest = np.lexsort((np.where(nan, np.inf, y), columns))[firsts]
+    highest = np.lexsort((np.where(nan, -np.inf, y), columns))[lasts]
+    keep = np.unique(np.concatenate([firsts, lasts, lowest, highest]))
+    return x[keep], y[keep]
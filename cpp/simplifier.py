@@ -0,0 +1,321 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from . import functions
+
+
+def canonicalize(function, max_iterations=8):
+    # Rewrite until a pass no longer changes the expression. Interning makes
+    # the identity check enough to detect the fixed point.
+    for _ in range(max_iterations):
+        result = Simplifier().visit(function)
+        if result is function:
+            break
+        function = result
+    return function
+
+
+class Simplifier:
+    def __init__(self):
+        self.memo = {}
+        self.keys = {}
+
+    def visit(self, func):
+        if func not in self.memo:
+            self.memo[func] = self._visit(func)
+        return self.memo[func]
+
+    def _visit(self, func):
+        func_type = type(func)
+
+        # No switches in Python :(
+        if is_sum(func):
+            return build_sum(*self.collect_terms(func))
+        elif func_type is functions.ProductFunction or func_type is functions.QuotientFunction \
+                or func_type is functions.NaryProductFunction:
+            return build_product(*self.collect_factors(func))
+        elif func_type is functions.PowerFunction:
+            exponent = self.visit(func.secondFunction)
+            if functions.is_number(exponent):
+                return build_product(*self.collect_factors(func))
+            base = self.visit(func.firstFunction)
+            if functions.has_num(base, 1):
+                return base
+            return functions.PowerFunction(base, exponent)
+        elif func_type is functions.PolynomialFunction:
+            return func.simplify()
+        elif func.children():
+            return fold_unary(func_type, self.visit(func.function))
+        return func
+
+    def collect_terms(self, func):
+        constant = 0.
+        terms = OrderedDict()
+        stack = [(func, 1.)]
+        while stack:
+            node, sign = stack.pop()
+            if type(node) is functions.SumFunction:
+                stack.append((node.secondFunction, sign))
+                stack.append((node.firstFunction, sign))
+                continue
+            if type(node) is functions.DifferenceFunction:
+                stack.append((node.secondFunction, -sign))
+                stack.append((node.firstFunction, sign))
+                continue
+            if type(node) is functions.NarySumFunction:
+                stack.extend((child, sign) for child in reversed(node.functions))
+                continue
+
+            node = self.visit(node)
+            if is_sum(node):
+                stack.append((node, sign))
+                continue
+
+            coefficient, term = split_coefficient(node)
+            if term is None:
+                constant += sign * coefficient
+            else:
+                terms[term] = terms.get(term, 0.) + sign * coefficient
+        return constant, terms
+
+    def collect_factors(self, func):
+        coefficient = 1.
+        factors = OrderedDict()
+        stack = [(func, 1.)]
+        while stack:
+            while stack:
+                node, power = stack.pop()
+                integral = float(power).is_integer()
+                node_type = type(node)
+                if integral and node_type is functions.ProductFunction:
+                    stack.append((node.secondFunction, power))
+                    stack.append((node.firstFunction, power))
+                    continue
+                if integral and node_type is functions.NaryProductFunction:
+                    stack.extend((child, power) for child in reversed(node.functions))
+                    continue
+                if integral and node_type is functions.QuotientFunction:
+                    stack.append((node.secondFunction, -power))
+                    stack.append((node.firstFunction, power))
+                    continue
+                if integral and node_type is functions.PowerFunction:
+                    exponent = self.visit(node.secondFunction)
+                    if functions.is_number(exponent):
+                        stack.append((node.firstFunction, power * exponent.number))
+                        continue
+
+                node = self.visit(node)
+                if integral and is_product(node):
+                    stack.append((node, power))
+                    continue
+
+                if functions.is_number(node):
+                    with np.errstate(all='ignore'):
+                        value = np.float64(node.number) ** power
+                    if np.isfinite(value):
+                        coefficient *= value
+                        continue
+                factors[node] = factors.get(node, 0.) + power
+
+            stack = self.cancel(factors)
+
+        factors = OrderedDict(sorted(factors.items(), key=lambda item: self.order_key(item[0])))
+        return coefficient, factors
+
+    def cancel(self, factors):
+        # Divide factors that every term of a sum shares out of the sum when they also appear in
+        # the denominator. Without this the quotient rule doubles the power of the denominator
+        # on every derivative.
+        denominator = {base: -exponent for base, exponent in factors.items() if exponent < 0}
+        if not denominator:
+            return []
+
+        for base, exponent in factors.items():
+            if exponent != 1 or not is_sum(base):
+                continue
+            constant, terms = self.collect_terms(base)
+            if constant != 0:
+                continue
+
+            products = [self.collect_factors(term) for term in terms]
+            common = dict(denominator)
+            for _, term_factors in products:
+                common = {
+                    factor: min(power, term_factors[factor])
+                    for factor, power in common.items()
+                    if term_factors.get(factor, 0) > 0 and float(term_factors[factor]).is_integer()
+                }
+            common = {factor: float(np.floor(power)) for factor, power in common.items() if power >= 1}
+            if not common:
+                continue
+
+            constant = 0.
+            reduced = OrderedDict()
+            for (term_coefficient, term_factors), sum_coefficient in zip(products, terms.values()):
+                remaining = OrderedDict(term_factors)
+                for factor, power in common.items():
+                    remaining[factor] -= power
+                _, term = split_coefficient(build_product(1., remaining))
+                if term is None:
+                    constant += term_coefficient * sum_coefficient
+                else:
+                    reduced[term] = reduced.get(term, 0.) + term_coefficient * sum_coefficient
+
+            del factors[base]
+            for factor, power in common.items():
+                factors[factor] += power
+            return [(build_sum(constant, reduced), 1.)]
+        return []
+
+    def order_key(self, func):
+        # Deterministic ordering of factors so that x * y and y * x end up the same
+        if func not in self.keys:
+            rank = ORDER.index(type(func))
+            if functions.is_number(func):
+                self.keys[func] = (rank, func.number)
+            elif type(func) is functions.PolynomialFunction:
+                self.keys[func] = (rank, func.center) + func.coefficients
+            else:
+                self.keys[func] = (rank,) + tuple(self.order_key(child) for child in func.children())
+        return self.keys[func]
+
+
+ORDER = [
+    functions.NaturalNumberFunction,
+    functions.RealNumberFunction,
+    functions.PiFunction,
+    functions.VariableFunction,
+    functions.SumFunction,
+    functions.DifferenceFunction,
+    functions.NarySumFunction,
+    functions.ProductFunction,
+    functions.NaryProductFunction,
+    functions.QuotientFunction,
+    functions.PowerFunction,
+    functions.SineFunction,
+    functions.CosineFunction,
+    functions.ExponentFunction,
+    functions.NaturalLogFunction,
+    functions.FactorialFunction,
+    functions.PolynomialFunction,
+]
+
+UNARY = {
+    functions.SineFunction: np.sin,
+    functions.CosineFunction: np.cos,
+    functions.ExponentFunction: np.exp,
+    functions.NaturalLogFunction: np.log,
+}
+
+
+def is_sum(func):
+    func_type = type(func)
+    return func_type is functions.SumFunction or func_type is functions.DifferenceFunction \
+        or func_type is functions.NarySumFunction
+
+
+def is_product(func):
+    func_type = type(func)
+    if func_type is functions.PowerFunction:
+        return functions.is_number(func.secondFunction)
+    return func_type is functions.ProductFunction or func_type is functions.QuotientFunction \
+        or func_type is functions.NaryProductFunction
+
+
+def split_coefficient(func):
+    if functions.is_number(func):
+        return func.number, None
+    if type(func) is functions.ProductFunction and functions.is_number(func.firstFunction):
+        return func.firstFunction.number, func.secondFunction
+    return 1., func
+
+
+def number(value):
+    return functions.RealNumberFunction(value)
+
+
+def scale(func, coefficient):
+    if coefficient == 1:
+        return func
+    return functions.ProductFunction(number(coefficient), func)
+
+
+def build_sum(constant, terms):
+    terms = OrderedDict((term, coefficient) for term, coefficient in terms.items() if coefficient != 0)
+    if len(terms) + (constant != 0) > 2:
+        # Longer sums become a single n-ary node so they do not nest one level per term
+        summands = [scale(term, coefficient) for term, coefficient in terms.items()]
+        if constant != 0:
+            summands.append(number(constant))
+        return functions.NarySumFunction(summands)
+
+    result = None
+    for term, coefficient in terms.items():
+        if coefficient == 0:
+            continue
+        if result is None:
+            result = scale(term, coefficient)
+        elif coefficient < 0:
+            result = functions.DifferenceFunction(result, scale(term, -coefficient))
+        else:
+            result = functions.SumFunction(result, scale(term, coefficient))
+
+    if result is None:
+        return number(constant)
+    if constant > 0:
+        return functions.SumFunction(result, number(constant))
+    if constant < 0:
+        return functions.DifferenceFunction(result, number(-constant))
+    return result
+
+
+def build_power(base, exponent):
+    if exponent == 1:
+        return base
+    if float(exponent).is_integer():
+        return functions.PowerFunction(base, functions.NaturalNumberFunction(exponent))
+    return functions.PowerFunction(base, number(exponent))
+
+
+def build_chain(factors):
+    if len(factors) > 2:
+        return functions.NaryProductFunction(factors)
+    result = None
+    for factor in factors:
+        result = factor if result is None else functions.ProductFunction(result, factor)
+    return result
+
+
+def build_product(coefficient, factors):
+    if coefficient == 0:
+        return number(0)
+
+    numerator = [build_power(base, exponent) for base, exponent in factors.items() if exponent > 0]
+    denominator = [build_power(base, -exponent) for base, exponent in factors.items() if exponent < 0]
+
+    result = build_chain(numerator)
+    if denominator:
+        result = functions.QuotientFunction(result or number(1), build_chain(denominator))
+    if result is None:
+        return number(coefficient)
+    return scale(result, coefficient)
+
+
+def fold_unary(func_type, arg):
+    if functions.is_number(arg):
+        if func_type is functions.FactorialFunction:
+            if float(arg.number).is_integer() and 0 <= arg.number <= 170:
+                return number(math.factorial(int(arg.number)))
+        else:
+            with np.errstate(all='ignore'):
+                value = UNARY[func_type](np.float64(arg.number))
+            if np.isfinite(value):
+                return number(value)
+
+    if func_type is functions.ExponentFunction and functions.is_log(arg):
+        return arg.function
+    if func_type is functions.NaturalLogFunction and type(arg) is functions.ExponentFunction:
+        return arg.function
+    return func_type(arg)
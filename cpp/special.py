@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+
+# n! for every n whose factorial still fits in a float64
+MAX_FACTORIAL = 170
+FACTORIALS = np.array([math.factorial(n) for n in range(MAX_FACTORIAL + 1)], dtype=np.float64)
+
+# Lanczos approximation with g = 7, accurate to about 15 significant digits
+LANCZOS_G = 7
+LANCZOS_COEFFICIENTS = [
+    0.99999999999980993,
+    676.5203681218851,
+    -1259.1392167224028,
+    771.32342877765313,
+    -176.61502916214059,
+    12.507343278686905,
+    -0.13857109526572012,
+    9.9843695780195716e-6,
+    1.5056327351493116e-7,
+]
+
+
+def factorial(num):
+    if np.ndim(num) == 0:
+        value = float(num)
+        if value.is_integer() and 0 <= value <= MAX_FACTORIAL:
+            return FACTORIALS[int(value)]
+        return gamma(value + 1.)[()]
+
+    num = np.asarray(num, dtype=np.float64)
+    result = np.empty(num.shape)
+    integral = (num == np.round(num)) & (num >= 0) & (num <= MAX_FACTORIAL)
+    result[integral] = FACTORIALS[num[integral].astype(np.intp)]
+    rest = ~integral
+    result[rest] = gamma(num[rest] + 1.)
+    return result
+
+
+def gamma(num):
+    num = np.asarray(num, dtype=np.float64)
+    reflect = num < 0.5
+    z = np.where(reflect, 1. - num, num) - 1.
+
+    a = np.full(z.shape, LANCZOS_COEFFICIENTS[0])
+    for i, coefficient in enumerate(LANCZOS_COEFFICIENTS[1:], 1):
+        a += coefficient / (z + i)
+
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        t = z + LANCZOS_G + 0.5
+        # Split the power in two so that it does not overflow before exp(-t) brings it back
+        half_power = t ** ((z + 0.5) / 2.)
+        result = np.sqrt(2. * np.pi) * half_power * (half_power * np.exp(-t)) * a
+        result = np.where(reflect, np.pi / (np.sin(np.pi * num) * result), result)
+
+    poles = (num <= 0) & (num == np.round(num))
+    return np.where(poles | np.isnan(num), np.nan, result)
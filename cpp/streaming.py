@@ -0,0 +1,30 @@
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def grid_size(start, stop, step):
+    # Same number of points as np.arange(start, stop, step)
+    return max(int(np.ceil((stop - start) / step)), 0)
+
+
+def grid_chunks(start, stop, step, chunk_size=DEFAULT_CHUNK_SIZE):
+    count = grid_size(start, stop, step)
+    for offset in range(0, count, chunk_size):
+        size = min(chunk_size, count - offset)
+        yield offset, start + (offset + np.arange(size)) * step
+
+
+def evaluate_chunks(function, start, stop, step, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Only one chunk of x and y is alive at a time, whatever the size of the range
+    program = function.compile()
+    for offset, x in grid_chunks(start, stop, step, chunk_size):
+        yield offset, x, np.broadcast_to(program(x), x.shape)
+
+
+def evaluate_to_file(function, path, start, stop, step, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64):
+    output = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(grid_size(start, stop, step),))
+    for offset, x, y in evaluate_chunks(function, start, stop, step, chunk_size):
+        output[offset:offset + len(x)] = y
+        output.flush()
+    return output
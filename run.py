@@ -1,13 +1,48 @@
 import sys
+import threading
 
 import numpy as np
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
 from PyQt5.QtWidgets import QApplication, QHBoxLayout, QLabel, QLineEdit, QPushButton, QSlider, QVBoxLayout, QWidget
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, \
     NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 
-from cpp import functions, gaussian, reader
+from cpp import differentiation, diskcache, functions, grids, reader, sampling
+
+
+class JobSignals(QObject):
+    result = pyqtSignal(int, object)
+    error = pyqtSignal(int, str)
+
+
+class Job(QRunnable):
+    # Runs a generator on the thread pool and posts everything it yields back to the GUI thread
+    # together with the callback that should get it. A cancelled job stops at its next yield.
+    def __init__(self, generation, work, callback):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.generation = generation
+        self.work = work
+        self.callback = callback
+        self.signals = JobSignals()
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            for result in self.work():
+                if self.cancelled.is_set():
+                    return
+                self.signals.result.emit(self.generation, (self.callback, result))
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.signals.error.emit(self.generation, f'{type(e).__name__}: {e}')
+        finally:
+            self.finished.set()
 
 
 class Window(QWidget):
@@ -17,6 +52,10 @@ class Window(QWidget):
         self.step = 0.01
         self.x = np.arange(-self.bound, self.bound, self.step)
         self.f = None
+        self.grids = grids.GridCache()
+        self.pool = QThreadPool.globalInstance()
+        self.jobs = []
+        self.generation = 0
         self.setupUI()
 
     def setupUI(self):
@@ -86,17 +125,46 @@ class Window(QWidget):
         self.setWindowTitle('Calculus in Professional Practice')
         self.show()
 
+    def submit(self, work, callback):
+        # work runs on the thread pool, callback gets everything it yields on the GUI thread.
+        # Jobs are kept until they finish, the pool does not own them.
+        self.jobs = [job for job in self.jobs if not job.finished.is_set()]
+        job = Job(self.generation, work, callback)
+        job.signals.result.connect(self.job_result)
+        job.signals.error.connect(self.job_error)
+        self.jobs.append(job)
+        self.pool.start(job)
+
+    def cancel_jobs(self):
+        # Results of jobs started before this are dropped even if they already were posted
+        self.generation += 1
+        for job in self.jobs:
+            job.cancel()
+
+    def job_result(self, generation, result):
+        if generation == self.generation:
+            callback, value = result
+            callback(value)
+
+    def job_error(self, generation, message):
+        if generation == self.generation:
+            print(message)
+
     def change_zoom(self, value):
+        self.cancel_jobs()
         self.bound = value / 10
         self.step = value / 10000
         self.sldlbl.setText(str(self.bound))
         self.x = np.arange(-self.bound, self.bound, self.step)
+        if self.f is not None:
+            self.plot_f(clear=True)
 
-    def plot(self, y, color, clear=False):
+    def plot(self, y, color, clear=False, x=None):
         ax = self.figure.add_subplot(111)
         if clear:
             ax.clear()
-        ax.plot(self.x, y, color)
+        x, y = sampling.decimate(self.x if x is None else x, y, self.canvas.width())
+        ax.plot(x, y, color)
         ax.grid(True, which='both')
         ax.axvline(x=0, color='k')
         ax.axhline(y=0, color='k')
@@ -120,61 +188,112 @@ class Window(QWidget):
         ax = self.figure.add_subplot(111)
         ax.clear()
 
-    def plot_f(self):
-        y = self.f.evaluate(self.x)
-        self.plot(y, 'r')
+    def plot_f(self, clear=False):
+        # Coarse samples and earlier refinements come from the zoom cache and are refined where
+        # the curve bends until there is about one point per pixel
+        f, bound, width = self.f, self.bound, self.canvas.width()
+
+        def work():
+            yield self.grids.sample_adaptive(f, -bound, bound, width, (-bound, bound))
+
+        self.submit(work, lambda samples: self.plot(samples[1], 'r', clear, samples[0]))
 
     def plotmain(self):
-        self.f = reader.read(self.le.text())
+        self.cancel_jobs()
+        text = self.le.text()
+
+        def work():
+            # The function is shown before the graph is rendered, so it can still be used when
+            # rendering fails, like without graphviz installed
+            f = reader.read(text)
+            yield f
+            f.create_graph()
+
+        self.submit(work, self.show_function)
+
+    def show_function(self, f):
+        self.f = f
         print(self.f)
-        self.f.create_graph()
-        y = self.f.evaluate(self.x)
-        self.plot(y, 'r', clear=True)
+        self.plot_f(clear=True)
 
     def plot_analytical_derivative(self):
-        d = self.f.analytical_derivative()
+        f, x = self.f, self.x
+
+        def work():
+            d = f.analytical_derivative()
+            yield d, d.simplify(), functions.evaluate_cached(d, x)
+
+        self.submit(work, lambda result: self.show_analytical_derivative(x, *result))
+
+    def show_analytical_derivative(self, x, d, simplified, y):
         print(d)
-        print(d.simplify())
-        y = d.evaluate(self.x)
-        self.plot(y, 'b')
+        print(simplified)
+        self.plot(y, 'b', x=x)
 
     def plot_newton_derivative(self):
-        y = self.f.newton_derivative(self.x, 0.1)
-        self.plot(y, 'g')
+        f, x = self.f, self.x
+
+        def work():
+            yield differentiation.on_grid(f, x)
+
+        self.submit(work, lambda y: self.plot(y, 'g', x=x))
 
     def plot_riemann_integral(self):
         x1 = float(self.i1.text())
         x2 = float(self.i2.text())
+        f = self.f
+
+        def work():
+            yield f.riemann_integral(x1, x2, 0.01)
+
+        self.submit(work, self.show_riemann_integral)
 
-        ix, iy, ans = self.f.riemann_integral(x1, x2, 0.01)
+    def show_riemann_integral(self, result):
+        ix, iy, ans = result
         self.plotline(ix, iy, 'm')
         print(ans)
 
     def plot_mclaurin_series_analytical(self):
+        # Every order is plotted as soon as it is done instead of after all eight
         self.clear()
-        color = 1.
-        for i in range(8):
-            taylor = functions.taylor_analytical(self.f, i + 1)
-            print(taylor)
-            y = taylor.evaluate(self.x)
-            color -= 0.1
-            self.plot(y, str(color))
         self.plot_f()
+        f, x = self.f, self.x
+
+        def work():
+            for i in range(8):
+                taylor = diskcache.taylor_analytical(f, i + 1)
+                yield i, taylor, taylor.evaluate(x)
+
+        self.submit(work, lambda result: self.show_taylor(x, *result))
 
     def plot_mclaurin_series_newton(self):
         self.clear()
-        color = 1.
-        for i in range(8):
-            taylor_y = functions.taylor_newton(self.f, self.x, i + 1)
-            color -= 0.1
-            self.plot(taylor_y, str(color))
         self.plot_f()
+        f, x = self.f, self.x
+
+        def work():
+            for i in range(8):
+                yield i, None, functions.taylor_newton(f, x, i + 1)
+
+        self.submit(work, lambda result: self.show_taylor(x, *result))
+
+    def show_taylor(self, x, i, taylor, y):
+        if taylor is not None:
+            print(taylor)
+        self.plot(y, str(round(0.9 - 0.1 * i, 1)), x=x)
 
     def plot_gauss(self):
-        func = gaussian.from_string(self.gauss_coords.text())
+        text, x = self.gauss_coords.text(), self.x
+
+        def work():
+            func = diskcache.interpolation(text)
+            yield func, functions.evaluate_cached(func, x)
+
+        self.submit(work, lambda result: self.show_gauss(x, *result))
+
+    def show_gauss(self, x, func, y):
         print(func)
-        y = func.evaluate(self.x)
-        self.plot(y, 'y')
+        self.plot(y, 'y', x=x)
 
 
 if __name__ == '__main__':
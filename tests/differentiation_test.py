@@ -0,0 +1,71 @@
+from cpp.functions import *
+from cpp import differentiation
+import numpy as np
+import pytest
+
+
+class TestDifferentiation:
+    func = ProductFunction(SineFunction(VariableFunction()), ExponentFunction(VariableFunction()))
+    x = np.arange(-3., 3., 0.01)
+    expected = (np.cos(x) + np.sin(x)) * np.exp(x)
+
+    def test_central(self):
+        assert np.allclose(differentiation.central(self.func, self.x), self.expected, atol=1e-8)
+
+    def test_richardson(self):
+        assert np.allclose(differentiation.richardson(self.func, self.x), self.expected, atol=1e-8)
+        assert differentiation.richardson(self.func, 1.) == pytest.approx((np.cos(1) + np.sin(1)) * np.e)
+
+    def test_complexStep(self):
+        assert np.allclose(differentiation.complex_step(self.func, self.x), self.expected, rtol=1e-14, atol=1e-14)
+
+    def test_onGrid(self):
+        assert np.allclose(differentiation.on_grid(self.func, self.x), self.expected, atol=1e-6)
+
+    def test_uniformReusesSamples(self):
+        y = self.func.evaluate(self.x)
+        assert np.allclose(differentiation.uniform(y, 0.01), self.expected, atol=1e-3)
+        with pytest.raises(ValueError):
+            differentiation.uniform(y, 0.01, order=3)
+
+    def test_constant(self):
+        func = SumFunction(NaturalNumberFunction(2), PiFunction())
+        assert np.array_equal(differentiation.complex_step(func, self.x), np.zeros_like(self.x))
+
+
+class TestTaylorCoefficients:
+    x = VariableFunction()
+    func = QuotientFunction(ExponentFunction(SineFunction(x)), SumFunction(NaturalNumberFunction(2), CosineFunction(x)))
+
+    def test_contour(self):
+        expected = self.func.taylor_coefficients(8, 0.3)
+        assert np.allclose(differentiation.contour_taylor(self.func, 8, 0.3), expected, rtol=1e-12, atol=1e-14)
+
+    def test_stencil(self):
+        expected = self.func.taylor_coefficients(4, 0.3)
+        assert np.allclose(differentiation.stencil_taylor(self.func, 4, 0.3), expected, atol=1e-5)
+
+    def test_fallsBackToStencil(self):
+        func = FactorialFunction(VariableFunction())
+        assert np.allclose(differentiation.taylor_coefficients(func, 3, 0.5), [1, 0, 0, 0], atol=1e-8)
+
+    def test_singularityNearCenter(self):
+        x = VariableFunction()
+        log = NaturalLogFunction(SumFunction(x, RealNumberFunction(0.3)))
+        runge = QuotientFunction(NaturalNumberFunction(1), SumFunction(
+            NaturalNumberFunction(1), ProductFunction(NaturalNumberFunction(25), PowerFunction(x, NaturalNumberFunction(2)))))
+        for func in [log, runge]:
+            expected = taylor_automatic(func, 8).coefficients
+            assert np.allclose(differentiation.taylor_coefficients(func, 8, 0.), expected, rtol=1e-8, atol=1e-6)
+
+    def test_notAnalytic(self):
+        func = PowerFunction(VariableFunction(), RealNumberFunction(0.5))
+        with pytest.raises(ValueError):
+            differentiation.contour_taylor(func, 4, 0.)
+        assert not np.any(np.isfinite(differentiation.taylor_coefficients(func, 4, 0.)[1:]))
+        with pytest.raises(ValueError):
+            differentiation.contour_taylor(func, 4, -1.)
+
+    def test_taylorNewton(self):
+        x = np.linspace(-0.5, 0.5, 11)
+        assert np.allclose(taylor_newton(self.func, x, 8), taylor_automatic(self.func, 8).evaluate(x))
@@ -0,0 +1,70 @@
+from cpp.functions import *
+from cpp import diskcache, reader
+import os
+import time
+
+
+class TestSerialize:
+    def test_roundTrip(self):
+        func = reader.read('+(*(n(5),r(2.5)),-(/(p,l(e(x))),^(s(c(!(x))),2)))')
+        assert diskcache.deserialize(diskcache.serialize(func)) is func
+
+    def test_sharedSubtreesWrittenOnce(self):
+        func = SineFunction(VariableFunction())
+        for _ in range(6):
+            func = func.analytical_derivative()
+        assert len(diskcache.serialize(func)) < len(func.to_string())
+
+    def test_deepExpression(self):
+        func = reader.read('s(' * 5000 + 'x' + ')' * 5000)
+        assert diskcache.deserialize(diskcache.serialize(func)) is func
+
+
+class TestDiskCache:
+    def test_warmStart(self, tmp_path):
+        func = reader.read('*(s(x),e(x))')
+        cache = diskcache.DiskCache(str(tmp_path))
+        first = diskcache.taylor_analytical(func, 5, cache=cache)
+        assert cache.misses == 1
+
+        cache = diskcache.DiskCache(str(tmp_path))
+        assert diskcache.taylor_analytical(func, 5, cache=cache) is first
+        assert cache.hits == 1
+
+    def test_interpolation(self, tmp_path):
+        cache = diskcache.DiskCache(str(tmp_path))
+        first = diskcache.interpolation('-3,-1;-2,0;-1,-1;0,2', cache=cache)
+        assert diskcache.interpolation('-3,-1; -2,0; -1,-1; 0,2', cache=cache) is first
+        assert cache.hits == 1
+
+    def test_eviction(self, tmp_path):
+        cache = diskcache.DiskCache(str(tmp_path), max_bytes=200)
+        for n in range(1, 6):
+            diskcache.derivative(reader.read('e(*(x,x))'), n, cache=cache)
+        assert cache.size() <= 200
+        assert len(os.listdir(str(tmp_path))) < 5
+
+    def test_corruptEntry(self, tmp_path):
+        cache = diskcache.DiskCache(str(tmp_path))
+        key = cache.key('derivative', 'broken')
+        with open(cache.path(key), 'wb') as file:
+            file.write(b'not a cache entry')
+        assert cache.get(key) is None
+
+    def test_staleTemporaryFiles(self, tmp_path):
+        cache = diskcache.DiskCache(str(tmp_path))
+        stale = tmp_path / 'crashed.tmp'
+        fresh = tmp_path / 'writing.tmp'
+        stale.write_bytes(b'x' * 10)
+        fresh.write_bytes(b'x' * 10)
+        old = time.time() - 2 * diskcache.STALE_SECONDS
+        os.utime(str(stale), (old, old))
+        assert cache.size() == 10
+        assert not stale.exists()
+        assert fresh.exists()
+
+    def test_versionInKey(self, tmp_path, monkeypatch):
+        cache = diskcache.DiskCache(str(tmp_path))
+        key = cache.key('derivative', 'x', 1)
+        monkeypatch.setattr(diskcache, 'VERSION', diskcache.VERSION + 1)
+        assert cache.key('derivative', 'x', 1) != key
@@ -1,5 +1,7 @@
 from cpp.functions import *
+from cpp import compiler
 import numpy as np
+import pytest
 
 
 class TestNaturalNumberFunction:
@@ -200,3 +202,313 @@ class TestFactorialFunction:
         one = RealNumberFunction(1)
         n = FactorialFunction(one)
         assert n.evaluate(5) == np.math.factorial(1)
+
+    def test_evaluateArray(self):
+        n = FactorialFunction(VariableFunction())
+        x = np.arange(0., 20., 0.5)
+        expected = [np.math.factorial(int(i)) for i in x]
+        assert np.allclose(n.evaluate(x), expected, rtol=1e-15)
+
+    def test_evaluateScalarTruncates(self):
+        n = FactorialFunction(VariableFunction())
+        assert n.evaluate(2.5) == 2.
+        assert n.evaluate(2.5) == n.evaluate(np.array([2.5]))[0] == n.compile()(2.5)
+
+    def test_evaluateReal(self):
+        n = FactorialFunction(QuotientFunction(VariableFunction(), RealNumberFunction(2)))
+        x = np.array([1., 3., 5.])
+        assert np.allclose(n.evaluate(x), [np.math.gamma(1.5), np.math.gamma(2.5), np.math.gamma(3.5)], rtol=1e-14)
+
+
+class TestCompile:
+    def test_matchesEvaluate(self):
+        x = np.arange(0.5, 4., 0.25)
+        funcs = [
+            SumFunction(VariableFunction(), NaturalNumberFunction(2)),
+            DifferenceFunction(VariableFunction(), PiFunction()),
+            ProductFunction(RealNumberFunction(1.5), VariableFunction()),
+            QuotientFunction(NaturalNumberFunction(1), VariableFunction()),
+            PowerFunction(VariableFunction(), NaturalNumberFunction(3)),
+            SineFunction(VariableFunction()),
+            CosineFunction(VariableFunction()),
+            ExponentFunction(VariableFunction()),
+            NaturalLogFunction(VariableFunction()),
+            FactorialFunction(VariableFunction()),
+        ]
+        for func in funcs:
+            assert np.allclose(func.compile()(x), func.evaluate(x))
+
+        integers = np.arange(3)
+        half = QuotientFunction(NaturalNumberFunction(1), NaturalNumberFunction(2))
+        for func in [SineFunction(NaturalNumberFunction(1)), half]:
+            assert np.allclose(func.compile()(integers), func.evaluate(integers))
+
+    def test_foldsConstants(self):
+        constant = SineFunction(ProductFunction(PiFunction(), RealNumberFunction(0.5)))
+        func = ProductFunction(constant, VariableFunction())
+        program = func.compile()
+        assert len(program) == 1
+        x = np.arange(-2., 2., 0.5)
+        assert np.allclose(program(x), func.evaluate(x))
+
+    def test_constantFunction(self):
+        func = FactorialFunction(NaturalNumberFunction(4))
+        x = np.arange(0., 3., 1.)
+        assert np.array_equal(func.compile()(x), np.full_like(x, 24.))
+
+
+class TestInterning:
+    def test_identicalExpressionsAreShared(self):
+        first = SumFunction(SineFunction(VariableFunction()), RealNumberFunction(2))
+        second = SumFunction(SineFunction(VariableFunction()), RealNumberFunction(2.))
+        assert first is second
+        assert first == second and hash(first) == hash(second)
+
+    def test_differentNumberTypes(self):
+        assert NaturalNumberFunction(1) != RealNumberFunction(1)
+
+    def test_immutable(self):
+        func = SineFunction(VariableFunction())
+        with pytest.raises(AttributeError):
+            func.function = PiFunction()
+        assert func.function is VariableFunction()
+
+    def test_derivativeSharesStructure(self):
+        derivative = ProductFunction(SineFunction(VariableFunction()), ExponentFunction(VariableFunction()))
+        for _ in range(8):
+            derivative = derivative.analytical_derivative()
+        assert count_nodes(derivative) * 100 < tree_size(derivative)
+
+    def test_noInstanceDict(self):
+        for func in [VariableFunction(), RealNumberFunction(3.5), SumFunction(VariableFunction(), PiFunction())]:
+            assert not hasattr(func, '__dict__')
+
+    def test_unhashableArguments(self):
+        assert RealNumberFunction(np.array(2.)) is RealNumberFunction(2.)
+        assert NaturalNumberFunction('7') is NaturalNumberFunction(7)
+
+
+class TestDerivativeCache:
+    def test_matchesRepeatedDerivative(self):
+        func = ProductFunction(SineFunction(VariableFunction()), VariableFunction())
+        expected = func
+        for _ in range(3):
+            expected = expected.analytical_derivative().canonicalize()
+        assert func.derivative(3) is expected
+        assert func.derivative(0) is func
+
+    def test_onlyComputesMissingOrders(self):
+        derivative_cache.clear()
+        func = CosineFunction(ExponentFunction(VariableFunction()))
+        func.derivative(4)
+        assert len(derivative_cache) == 4
+        func.derivative(2)
+        func.derivative(5)
+        assert len(derivative_cache) == 5
+        assert derivative_cache.info().hits == 2
+
+    def test_evictsLeastRecentlyUsed(self):
+        derivative_cache.clear()
+        derivative_cache.resize(3)
+        try:
+            func = SineFunction(VariableFunction())
+            func.derivative(5)
+            assert len(derivative_cache) == 3
+            assert (func, 1) not in derivative_cache
+            assert (func, 5) in derivative_cache
+        finally:
+            derivative_cache.resize(256)
+
+
+class TestTaylorCoefficients:
+    def test_matchesAnalyticalDerivatives(self):
+        x = VariableFunction()
+        denominator = SumFunction(NaturalNumberFunction(2), NaturalLogFunction(x))
+        func = QuotientFunction(ExponentFunction(SineFunction(x)), denominator)
+        centers = np.array([0.5, 1., 2.5])
+        coefficients = func.taylor_coefficients(4, centers)
+        assert coefficients.shape == (5, 3)
+        for k in range(5):
+            expected = func.derivative(k).evaluate(centers) / np.math.factorial(k)
+            assert np.allclose(coefficients[k], expected)
+
+    def test_powers(self):
+        x = VariableFunction()
+        coefficients = PowerFunction(x, NaturalNumberFunction(3)).taylor_coefficients(4, 0.)
+        assert np.allclose(coefficients, [0., 0., 0., 1., 0.])
+        coefficients = PowerFunction(x, x).taylor_coefficients(1, 2.)
+        assert np.allclose(coefficients, [4., 4. * (np.log(2.) + 1.)])
+
+    def test_taylorAutomatic(self):
+        sin = SineFunction(VariableFunction())
+        assert taylor_automatic(sin, 7) is taylor_analytical(sin, 7)
+
+
+class TestEvaluateWithDerivative:
+    def test_matchesAnalyticalDerivative(self):
+        x = VariableFunction()
+        funcs = [
+            QuotientFunction(ExponentFunction(SineFunction(x)), SumFunction(NaturalNumberFunction(2), CosineFunction(x))),
+            PowerFunction(DifferenceFunction(x, PiFunction()), NaturalNumberFunction(3)),
+            ProductFunction(NaturalLogFunction(x), RealNumberFunction(2.5)),
+        ]
+        points = np.arange(0.5, 5., 0.125)
+        for func in funcs:
+            value, derivative = func.evaluate_with_derivative(points)
+            assert np.allclose(value, func.evaluate(points), rtol=1e-15, atol=0)
+            assert np.allclose(derivative, func.analytical_derivative().evaluate(points), rtol=1e-13, atol=0)
+
+    def test_variableExponent(self):
+        x = VariableFunction()
+        value, derivative = PowerFunction(x, x).evaluate_with_derivative(np.array([2.]))
+        assert np.allclose(value, 4.)
+        assert np.allclose(derivative, 4. * (np.log(2.) + 1.))
+
+
+class TestIntegrate:
+    def test_sine(self):
+        value, error, evaluations = SineFunction(VariableFunction()).integrate(0, np.pi)
+        assert abs(value - 2.) < 1e-10
+        assert error < 1e-10
+        assert evaluations < 100
+
+    def test_reversedLimits(self):
+        func = ExponentFunction(VariableFunction())
+        assert np.isclose(func.integrate(1, 0).value, 1 - np.e)
+
+    def test_adaptsToSingularity(self):
+        func = PowerFunction(VariableFunction(), RealNumberFunction(0.5))
+        result = func.integrate(0, 1, tol=1e-8)
+        assert abs(result.value - 2. / 3.) < 1e-8
+        assert result.evaluations < 10000
+
+
+class TestEvaluateMany:
+    def test_matchesEvaluate(self):
+        sin = SineFunction(VariableFunction())
+        funcs = [sin, sin.derivative(), taylor_analytical(sin, 3), NaturalNumberFunction(2)]
+        x = np.arange(-3., 3., 0.1)
+        ys = evaluate_many(funcs, x)
+        assert ys.shape == (4, len(x))
+        for func, y in zip(funcs, ys):
+            assert np.allclose(y, func.evaluate(x))
+
+    def test_sharesSubexpressions(self):
+        sin = SineFunction(VariableFunction())
+        first = ProductFunction(sin, NaturalNumberFunction(2))
+        second = SumFunction(sin, NaturalNumberFunction(2))
+        program = compiler.compile_functions([first, second])
+        assert len(program) == 3
+
+
+class TestPolynomialFunction:
+    poly = PolynomialFunction([2, 7, 5, 1])
+
+    def test_evaluate(self):
+        x = np.arange(-3., 3., 0.1)
+        assert np.allclose(self.poly.evaluate(x), np.polyval([1, 5, 7, 2], x))
+        assert np.allclose(PolynomialFunction([1, 2], 3.).evaluate(x), 1 + 2 * (x - 3))
+
+    def test_keywordArguments(self):
+        assert PolynomialFunction([1, 2], center=1.0) is PolynomialFunction([1, 2], 1.0)
+        assert PolynomialFunction(coefficients=[1, 2]) is PolynomialFunction([1, 2])
+
+    def test_toString(self):
+        assert self.poly.to_string() == '(2.0 + (7.0 * x) + (5.0 * (x ^ 2)) + (1.0 * (x ^ 3)))'
+        assert PolynomialFunction([0, 0, 3], 1.).to_string() == '(3.0 * ((x - 1.0) ^ 2))'
+
+    def test_analyticalDerivative(self):
+        assert self.poly.analytical_derivative() is PolynomialFunction([7, 10, 3])
+        assert PolynomialFunction([4]).analytical_derivative().simplify() is RealNumberFunction(0)
+
+    def test_simplify(self):
+        assert PolynomialFunction([1, 2, 0, 0]).simplify() is PolynomialFunction([1, 2])
+        assert PolynomialFunction([3, 0]).simplify() is RealNumberFunction(3)
+
+    def test_riemannIntegral(self):
+        _, _, ans = self.poly.riemann_integral(0, 1)
+        assert ans == pytest.approx(2 + 7 / 2 + 5 / 3 + 1 / 4)
+
+    def test_derivativesAgree(self):
+        x = np.arange(-3., 3., 0.1)
+        derivative = self.poly.analytical_derivative().evaluate(x)
+        assert np.allclose(self.poly.evaluate_with_derivative(x)[1], derivative)
+        assert np.allclose(self.poly.evaluate_jet(x, 2)[1], derivative)
+        assert np.allclose(self.poly.compile()(x), self.poly.evaluate(x))
+
+    def test_highDegree(self):
+        poly = PolynomialFunction(np.ones(5000))
+        assert poly.evaluate(0.5) == pytest.approx(2.)
+
+    def test_taylor(self):
+        func = ExponentFunction(VariableFunction())
+        taylor = taylor_analytical(func, 6, 1.)
+        assert type(taylor) is PolynomialFunction
+        assert taylor.evaluate(1.2) == pytest.approx(np.exp(1.2))
+
+    def test_taylorIntegerCenter(self):
+        func = ProductFunction(RealNumberFunction(1.25), PowerFunction(VariableFunction(), NaturalNumberFunction(2)))
+        assert np.allclose(taylor_analytical(func, 2, 1).coefficients, [1.25, 2.5, 1.25])
+
+
+class TestNaryFunctions:
+    def test_sumAllIsShallow(self):
+        x = VariableFunction()
+        terms = [ProductFunction(RealNumberFunction(i), PowerFunction(x, NaturalNumberFunction(i))) for i in range(1, 5000)]
+        func = sum_all(terms)
+        assert type(func) is NarySumFunction
+        assert count_nodes(func) == 4 * len(terms) + 2
+        points = np.array([-0.5, 0.25])
+        expected = sum(i * points ** i for i in range(1, 5000))
+        assert np.allclose(func.evaluate(points), expected)
+        assert np.allclose(func.compile()(points), expected)
+        assert func.to_string().count('+') == len(terms) - 1
+        assert type(func.canonicalize()) is NarySumFunction
+
+    def test_productDerivative(self):
+        x = VariableFunction()
+        func = NaryProductFunction([SineFunction(x), x, ExponentFunction(x)])
+        points = np.arange(-2., 2., 0.25)
+        derivative = func.analytical_derivative().evaluate(points)
+        assert np.allclose(derivative, (np.cos(points) * points + np.sin(points) + np.sin(points) * points) * np.exp(points))
+        assert np.allclose(func.evaluate_with_derivative(points)[1], derivative)
+        assert np.allclose(func.evaluate_jet(points, 1)[1], derivative)
+
+    def test_simplify(self):
+        x = VariableFunction()
+        assert NarySumFunction([NaturalNumberFunction(1), x, RealNumberFunction(2)]).simplify() is \
+            NarySumFunction([x, RealNumberFunction(3)])
+        assert NaryProductFunction([x, NaturalNumberFunction(0), x]).simplify() is RealNumberFunction(0)
+        assert NaryProductFunction([NaturalNumberFunction(1), x]).simplify() is x
+
+
+class TestEvaluationCache:
+    def test_hitOnEqualGrid(self):
+        evaluation_cache.clear()
+        func = SineFunction(VariableFunction())
+        first = evaluate_cached(func, np.arange(-3., 3., 0.01))
+        second = evaluate_cached(func, np.arange(-3., 3., 0.01))
+        assert first is second
+        assert np.allclose(first, np.sin(np.arange(-3., 3., 0.01)))
+        assert evaluation_cache.info().hits == 1
+        assert not first.flags.writeable
+
+    def test_differentGridMisses(self):
+        evaluation_cache.clear()
+        func = CosineFunction(VariableFunction())
+        evaluate_cached(func, np.arange(0., 1., 0.1))
+        evaluate_cached(func, np.arange(0., 1., 0.2))
+        evaluate_cached(func, np.arange(0., 1., 0.1).astype(np.float32))
+        assert evaluation_cache.info().misses == 3
+
+    def test_byteLimit(self):
+        evaluation_cache.clear()
+        set_evaluation_cache_size(3 * 800)
+        try:
+            x = np.arange(100.)
+            for i in range(5):
+                evaluate_cached(ProductFunction(NaturalNumberFunction(i), VariableFunction()), x)
+            assert len(evaluation_cache) == 3
+            assert evaluation_cache.info().currsize == 3 * 800
+        finally:
+            set_evaluation_cache_size(64 * 1024 * 1024)
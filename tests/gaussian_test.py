@@ -0,0 +1,68 @@
+from cpp import gaussian
+import numpy as np
+import pytest
+
+
+class TestGaussianElimination:
+    def test_solve(self):
+        matrix = np.array([[2, 1, -1, 8], [-3, -1, 2, -11], [-2, 1, 2, -3]], dtype=float)
+        assert np.allclose(gaussian.gaussian_elimination(matrix), [2, 3, -1])
+
+    def test_singular(self):
+        with pytest.raises(AssertionError, match='Matrix is singular!'):
+            gaussian.gaussian_elimination(np.array([[1, 2, 3], [2, 4, 5]], dtype=float))
+
+    def test_wrongSize(self):
+        with pytest.raises(AssertionError):
+            gaussian.gaussian_elimination(np.ones((3, 3)))
+
+    def test_createMatrix(self):
+        coordinates = np.array([[-3, -1], [-2, 0], [-1, -1], [0, 2]], dtype=float)
+        expected = [gaussian.create_matrix_row(coordinate, 4) for coordinate in coordinates]
+        assert np.allclose(gaussian.create_matrix(coordinates), expected)
+
+    def test_solveMany(self):
+        coordinates = np.random.default_rng(1).normal(size=(20, 5, 2))
+        values = gaussian.solve_many(coordinates)
+        assert values.shape == (20, 5)
+        for value, points in zip(values, coordinates):
+            assert np.allclose(np.polyval(value, points[:, 0]), points[:, 1])
+
+    def test_fromString(self):
+        func = gaussian.from_string('-3,-1;-2,0;-1,-1;0,2')
+        x = np.array([-3., -2., -1., 0.])
+        assert np.allclose(func.evaluate(x), [-1, 0, -1, 2])
+
+
+class TestInterpolation:
+    coordinates = np.array([[-3, -1], [-2, 0], [-1, -1], [0, 2]], dtype=float)
+
+    def test_matchesGaussianElimination(self):
+        interpolation = gaussian.Interpolation(self.coordinates)
+        expected = gaussian.gaussian_elimination(gaussian.create_matrix(self.coordinates))
+        assert np.allclose(interpolation.polynomial(), expected)
+        x = np.linspace(-4, 1, 50)
+        assert np.allclose(interpolation(x), np.polyval(expected, x))
+
+    def test_exactAtNodes(self):
+        interpolation = gaussian.Interpolation(self.coordinates)
+        assert np.array_equal(interpolation(self.coordinates[:, 0]), self.coordinates[:, 1])
+
+    def test_addPoint(self):
+        interpolation = gaussian.Interpolation(self.coordinates[:2])
+        for x, y in self.coordinates[2:]:
+            interpolation.add_point(x, y)
+        x = np.linspace(-4, 1, 50)
+        assert np.allclose(interpolation(x), gaussian.Interpolation(self.coordinates)(x))
+        with pytest.raises(ValueError):
+            interpolation.add_point(0, 1)
+
+    def test_manyPoints(self):
+        x = np.cos(np.pi * (np.arange(1000) + .5) / 1000)
+        interpolation = gaussian.Interpolation(np.stack([x, np.exp(x)], axis=1))
+        t = np.linspace(-1, 1, 101)
+        assert np.allclose(interpolation(t), np.exp(t))
+
+    def test_toFunction(self):
+        func = gaussian.Interpolation(self.coordinates).to_function()
+        assert np.allclose(func.evaluate(self.coordinates[:, 0]), self.coordinates[:, 1])
@@ -0,0 +1,57 @@
+from cpp.functions import *
+from cpp import grids
+import numpy as np
+
+
+class TestGridCache:
+    func = ProductFunction(SineFunction(VariableFunction()), ExponentFunction(VariableFunction()))
+
+    def test_sample(self):
+        cache = grids.GridCache()
+        x, y = cache.sample(self.func, -2., 2., 0.01)
+        assert x[0] >= -2. and x[-1] <= 2.
+        assert np.all(np.diff(x) <= 0.01)
+        assert np.allclose(y, np.sin(x) * np.exp(x))
+
+    def test_zoomOutOnlyEvaluatesNewPoints(self):
+        cache = grids.GridCache()
+        cache.sample(self.func, -1., 1., 0.01)
+        evaluations = cache.evaluations
+        x, y = cache.sample(self.func, -2., 2., 0.01)
+        assert cache.evaluations - evaluations == len(x) - evaluations
+        assert np.allclose(y, np.sin(x) * np.exp(x))
+
+    def test_disjointRangeDoesNotFillTheGap(self):
+        cache = grids.GridCache()
+        cache.sample(self.func, 0., 0.01, 1e-4)
+        evaluations = cache.evaluations
+        x, y = cache.sample(self.func, 5., 5.01, 1e-4)
+        assert cache.evaluations - evaluations == len(x)
+        assert np.allclose(y, np.sin(x) * np.exp(x))
+
+    def test_zoomInReusesCoarseSamples(self):
+        cache = grids.GridCache()
+        cache.sample(self.func, -2., 2., 0.02)
+        evaluations = cache.evaluations
+        x, y = cache.sample(self.func, -2., 2., 0.01)
+        assert cache.evaluations - evaluations < len(x) * 0.6
+        assert np.allclose(y, np.sin(x) * np.exp(x))
+
+    def test_repeatedSampleIsFree(self):
+        cache = grids.GridCache()
+        first = cache.sample(self.func, -1., 1., 0.001)
+        evaluations = cache.evaluations
+        second = cache.sample(self.func, -0.5, 0.5, 0.001)
+        assert cache.evaluations == evaluations
+        assert np.array_equal(second[1], first[1][(first[0] >= second[0][0]) & (first[0] <= second[0][-1])])
+
+    def test_adaptiveReusesRefinedSamples(self):
+        cache = grids.GridCache()
+        func = SineFunction(QuotientFunction(NaturalNumberFunction(1), VariableFunction()))
+        cache.sample_adaptive(func, -2., 2., 800, (-2., 2.))
+        cache.sample_adaptive(func, -1., 1., 800, (-1., 1.))
+        evaluations = cache.evaluations
+        x, y = cache.sample_adaptive(func, -2., 2., 800, (-2., 2.))
+        assert cache.evaluations == evaluations
+        assert x[0] >= -2. and x[-1] <= 2. and np.all(np.diff(x) > 0)
+        assert np.allclose(y, np.sin(1 / x), equal_nan=True)
@@ -0,0 +1,23 @@
+from cpp.functions import *
+from cpp import parallel
+import numpy as np
+import pytest
+
+
+class TestEvaluateParallel:
+    def test_threads(self):
+        func = ProductFunction(SineFunction(VariableFunction()), ExponentFunction(CosineFunction(VariableFunction())))
+        x = np.arange(-10., 10., 0.001)
+        y = parallel.evaluate_parallel(func, x, workers=4, chunk_size=1000)
+        assert np.allclose(y, func.evaluate(x))
+
+    def test_processes(self):
+        func = FactorialFunction(VariableFunction())
+        x = np.arange(0., 20., 0.01).reshape(40, 50)
+        y = parallel.evaluate_parallel(func, x, workers=2, chunk_size=500, mode='process')
+        assert y.shape == x.shape
+        assert np.allclose(y, func.evaluate(x.ravel()).reshape(x.shape))
+
+    def test_invalidMode(self):
+        with pytest.raises(ValueError):
+            parallel.evaluate_parallel(VariableFunction(), np.arange(3.), mode='gpu')
@@ -0,0 +1,67 @@
+from cpp.functions import *
+from cpp import reader
+import pytest
+
+
+class TestRead:
+    def test_operators(self):
+        func = reader.read('+(*(n(5),r(2.5)),-(/(p,l(e(x))),^(s(c(!(x))),2)))')
+        assert func.to_string() == '((5 * 2.5) + ((π / ln((e ^ x))) - (sin(cos(x!)) ^ 2)))'
+
+    def test_numbers(self):
+        assert reader.read('12') is NaturalNumberFunction(12)
+        assert reader.read('1.5') is RealNumberFunction(1.5)
+        assert reader.read('n(5.3)') is NaturalNumberFunction(5)
+        assert reader.read('r(-2)') is RealNumberFunction(-2)
+
+    def test_whitespace(self):
+        assert reader.read(' + ( x , 2 ) ') is reader.read('+(x,2)')
+
+    def test_errorPosition(self):
+        with pytest.raises(ValueError, match='position 3'):
+            reader.read('+(x)')
+        with pytest.raises(ValueError, match='position 0'):
+            reader.read('q(x)')
+        with pytest.raises(ValueError, match='position 6'):
+            reader.read('+(x,2))')
+
+    def test_deepNesting(self):
+        depth = 50000
+        func = reader.read('s(' * depth + 'x' + ')' * depth)
+        assert count_nodes(func) == depth + 1
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            reader.read(' ')
+
+
+class TestReadCache:
+    def setup_method(self):
+        reader.clear_cache()
+
+    def test_hitsOnNormalizedFormula(self):
+        first = reader.read('+(x, 2)')
+        second = reader.read(' +(x,2) ')
+        assert first is second
+        parsed, _ = reader.cache_info()
+        assert (parsed.hits, parsed.misses, parsed.currsize) == (1, 1, 1)
+
+    def test_spaceSeparatesTokens(self):
+        reader.read('12')
+        with pytest.raises(ValueError):
+            reader.read('1 2')
+
+    def test_readCompiled(self):
+        program = reader.read_compiled('s(x)')
+        assert reader.read_compiled('s( x )') is program
+        assert reader.cache_info()[1].hits == 1
+
+    def test_size(self):
+        reader.set_cache_size(2)
+        try:
+            for formula in ['x', 's(x)', 'c(x)']:
+                reader.read(formula)
+            assert reader.cache_info()[0].currsize == 2
+            assert reader.normalize(reader.tokenize('x')) not in reader.parse_cache
+        finally:
+            reader.set_cache_size(1024)
@@ -0,0 +1,57 @@
+from cpp.functions import *
+from cpp import sampling
+import numpy as np
+
+
+class TestAdaptive:
+    def test_straightLineStaysCoarse(self):
+        func = ProductFunction(NaturalNumberFunction(2), VariableFunction())
+        x, y = sampling.adaptive(func, -10., 10., 800)
+        assert len(x) == sampling.INITIAL_POINTS
+        assert np.allclose(y, 2 * x)
+
+    def test_capsPoints(self):
+        func = SineFunction(QuotientFunction(NaturalNumberFunction(1), VariableFunction()))
+        x, y = sampling.adaptive(func, -1., 1., 300)
+        assert len(x) <= 300
+        assert np.all(np.diff(x) > 0)
+
+    def test_refinesWhereCurved(self):
+        square = PowerFunction(VariableFunction(), NaturalNumberFunction(2))
+        func = ExponentFunction(ProductFunction(NaturalNumberFunction(-50), square))
+        x, y = sampling.adaptive(func, -10., 10., 800)
+        assert np.allclose(y, func.evaluate(x))
+        assert np.count_nonzero(np.abs(x) < 1) > np.count_nonzero(np.abs(x) > 5)
+        dense = np.linspace(-10., 10., 100001)
+        assert np.max(np.abs(np.interp(dense, x, y) - func.evaluate(dense))) < 1e-2
+
+    def test_initialSamples(self):
+        func = SineFunction(VariableFunction())
+        initial = np.linspace(0., 3., 4), np.sin(np.linspace(0., 3., 4))
+        x, y = sampling.adaptive(func, 0., 3., 100, initial)
+        assert len(x) > 4 and np.allclose(y, np.sin(x))
+
+
+class TestDecimate:
+    def test_keepsSpikes(self):
+        x = np.linspace(0., 1., 100000)
+        y = np.sin(50 * x)
+        y[12345] = 50.
+        xd, yd = sampling.decimate(x, y, 500)
+        assert len(xd) <= 4 * 500
+        assert yd.max() == 50. and yd.min() == y.min()
+        assert xd[0] == x[0] and xd[-1] == x[-1]
+
+    def test_nanIsNotAnExtreme(self):
+        x = np.linspace(0., 1., 100000)
+        y = np.sin(50 * x)
+        y[12300] = np.nan
+        y[12345] = 50.
+        y[12350] = -50.
+        xd, yd = sampling.decimate(x, y, 500)
+        assert np.nanmax(yd) == 50. and np.nanmin(yd) == -50.
+
+    def test_smallInputUnchanged(self):
+        x = np.arange(10.)
+        xd, yd = sampling.decimate(x, x, 500)
+        assert xd is x
@@ -0,0 +1,48 @@
+from cpp.functions import *
+from cpp.simplifier import canonicalize
+import numpy as np
+
+
+class TestCanonicalize:
+    def test_collectsLikeTerms(self):
+        x = VariableFunction()
+        func = SumFunction(ProductFunction(x, x), ProductFunction(x, x))
+        assert canonicalize(func) is ProductFunction(RealNumberFunction(2), PowerFunction(x, NaturalNumberFunction(2)))
+
+    def test_cancelsDifference(self):
+        x = VariableFunction()
+        assert canonicalize(DifferenceFunction(x, x)) is RealNumberFunction(0)
+
+    def test_mergesPowers(self):
+        x = VariableFunction()
+        quotient = QuotientFunction(x, PowerFunction(x, RealNumberFunction(4)))
+        func = ProductFunction(PowerFunction(x, NaturalNumberFunction(2)), quotient)
+        assert canonicalize(func) is QuotientFunction(RealNumberFunction(1), x)
+
+    def test_commutativeProducts(self):
+        x = VariableFunction()
+        first = ProductFunction(SineFunction(x), x)
+        second = ProductFunction(x, SineFunction(x))
+        assert canonicalize(first) is canonicalize(second)
+
+    def test_foldsTaylorConstants(self):
+        x = VariableFunction()
+        func = taylorify(CosineFunction(x), 2, 0.)
+        assert canonicalize(func) is ProductFunction(RealNumberFunction(0.5), PowerFunction(x, NaturalNumberFunction(2)))
+
+    def test_preservesValues(self):
+        x = VariableFunction()
+        func = QuotientFunction(ExponentFunction(SineFunction(x)), SumFunction(NaturalNumberFunction(2), CosineFunction(x)))
+        points = np.linspace(-3., 3., 61)
+        expected = func
+        actual = func
+        for _ in range(4):
+            expected = expected.analytical_derivative()
+            actual = canonicalize(actual.analytical_derivative())
+            assert np.allclose(actual.evaluate(points), expected.evaluate(points))
+        assert tree_size(actual) < tree_size(expected)
+
+    def test_longSumsAreNary(self):
+        x = VariableFunction()
+        func = SumFunction(SineFunction(x), SumFunction(CosineFunction(x), SumFunction(x, NaturalNumberFunction(2))))
+        assert canonicalize(func) is NarySumFunction([SineFunction(x), CosineFunction(x), x, RealNumberFunction(2)])
@@ -0,0 +1,23 @@
+from cpp.functions import *
+from cpp import streaming
+import numpy as np
+
+
+class TestStreaming:
+    def test_chunksCoverGrid(self):
+        x = np.arange(-5., 5., 0.01)
+        chunks = list(streaming.grid_chunks(-5., 5., 0.01, chunk_size=128))
+        assert all(len(chunk) <= 128 for _, chunk in chunks)
+        assert np.allclose(np.concatenate([chunk for _, chunk in chunks]), x)
+
+    def test_evaluateChunks(self):
+        func = ProductFunction(SineFunction(VariableFunction()), VariableFunction())
+        x = np.arange(0., 3., 0.001)
+        y = np.concatenate([y for _, _, y in streaming.evaluate_chunks(func, 0., 3., 0.001, chunk_size=500)])
+        assert np.allclose(y, func.evaluate(x))
+
+    def test_evaluateToFile(self, tmp_path):
+        func = ExponentFunction(QuotientFunction(VariableFunction(), NaturalNumberFunction(4)))
+        path = str(tmp_path / 'values.npy')
+        streaming.evaluate_to_file(func, path, -2., 2., 0.01, chunk_size=64)
+        assert np.allclose(np.load(path), func.evaluate(np.arange(-2., 2., 0.01)))